@@ -0,0 +1,16 @@
+"""
+N-Queens search over bitboard states, a Python port of NQueensSolver.cs
+that writes the nqueens_data.csv schema.
+
+Run from the lab3 directory:
+    python -m nqueens solve 8 [-m bfs|dfs|bf] [-H h1|h2|hdod]
+                        [-l none|minimal|partial|full] [-o first|all]
+                        [--symmetry]
+    python -m nqueens experiments [min_n] [max_n]
+                        [-l none|minimal|partial|full] [-o first|all]
+                        [--symmetry] [--csv assets/nqueens_data.csv]
+"""
+
+from .experiments import COLUMNS, experiment_row, run_experiments
+from .search import (HEURISTICS, METHODS, PRUNING_LEVELS, SOLUTION_MODES,
+                     Statistics, decode, encode, solve)
@@ -0,0 +1,83 @@
+import argparse
+import sys
+
+from .experiments import run_experiments
+from .search import (HEURISTICS, METHODS, PRUNING_LEVELS, SOLUTION_MODES,
+                     solve)
+
+METHOD_NAMES = {"bfs": "BFS", "dfs": "DFS", "bf": "BestFirst"}
+
+def print_results(n, method, heuristic, pruning, mode, stats):
+    mode_text = ("finding first solution" if mode == "first"
+                 else "finding all solutions")
+    name = METHOD_NAMES[method]
+    if method == "bf":
+        name += f" ({heuristic.upper()})"
+    print(f"\nN-Queens solution for n={n} using {name} with {pruning} "
+          f"pruning, {mode_text}:")
+    if stats.first_solution is None:
+        print("No solution found!")
+    else:
+        print(f"\nFirst solution state: {stats.first_solution}")
+        for col in stats.first_solution:
+            print(" ".join("Q" if c == col else "." for c in range(n)))
+    print("\nStatistics:")
+    print(f"Total solutions found: {stats.solutions}")
+    print(f"Maximum Open list size: {stats.max_open}")
+    print(f"Total states enqueued: {stats.enqueued}")
+    print(f"States in Closed list (checked): {stats.closed}")
+    print(f"Execution time: {stats.time_ms:.2f} ms")
+
+def main():
+    p = argparse.ArgumentParser(
+        prog="python -m nqueens",
+        description="N-Queens Solver - BFS vs DFS vs BestFirst Comparison"
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    def add_common(parser):
+        parser.add_argument("-l", "--level", choices=PRUNING_LEVELS,
+                            default="full", help="pruning level (default full)")
+        parser.add_argument("-o", "--solution-mode", choices=SOLUTION_MODES,
+                            default="all", help="solution mode (default all)")
+        parser.add_argument("--symmetry", action="store_true",
+                            help="only search states up to mirror symmetry")
+
+    s = sub.add_parser("solve", help="solve n-Queens for a specific n")
+    s.add_argument("n", type=int)
+    s.add_argument("-m", "--method", choices=METHODS,
+                   help="search method (default: all of them)")
+    s.add_argument("-H", "--heuristic", choices=HEURISTICS, default="h1",
+                   help="heuristic of best-first search (default h1)")
+    add_common(s)
+
+    e = sub.add_parser("experiments",
+                       help="run every searcher for n = min_n..max_n")
+    e.add_argument("min_n", type=int, nargs="?", default=4)
+    e.add_argument("max_n", type=int, nargs="?", default=8)
+    e.add_argument("--csv", default=None,
+                   help="CSV output (default: print to stdout)")
+    add_common(e)
+    args = p.parse_args()
+
+    if args.command == "solve":
+        methods = [args.method] if args.method else METHODS
+        for method in methods:
+            stats = solve(args.n, method, args.level, args.solution_mode,
+                          args.heuristic, args.symmetry)
+            print_results(args.n, method, args.heuristic, args.level,
+                          args.solution_mode, stats)
+        return
+
+    mode_text = ("finding first solution only"
+                 if args.solution_mode == "first" else "finding all solutions")
+    print(f"Running experiments from n={args.min_n} to n={args.max_n} with "
+          f"{args.level} pruning, {mode_text}", file=sys.stderr)
+    rows = run_experiments(args.min_n, args.max_n, args.level,
+                           args.solution_mode, args.symmetry,
+                           out=args.csv if args.csv else sys.stdout)
+    if args.csv:
+        print(f"Saved {len(rows)} rows to '{args.csv}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Experiment table of NQueensSolver.RunExperiments, in the CSV schema of
+assets/nqueens_data.csv that plot_nqueens.py reads.
+"""
+
+import csv
+
+from .search import solve
+
+# Column prefix, method and heuristic of every searcher in the table
+SEARCHERS = [
+    ("BFS", "bfs", "h1"),
+    ("DFS", "dfs", "h1"),
+    ("BH1", "bf", "h1"),
+    ("BH2", "bf", "h2"),
+    ("Hdod", "bf", "hdod"),
+]
+
+COLUMNS = ["n"] + [
+    f"{prefix}-{stat}"
+    for prefix, _, _ in SEARCHERS
+    for stat in ("Max", "Enq", "Cls", "T")
+] + ["Sol"]
+
+def experiment_row(n, pruning="full", mode="all", symmetry=False):
+    """One CSV row (dict keyed by COLUMNS) for board size n."""
+    row = {"n": n}
+    for prefix, method, heuristic in SEARCHERS:
+        stats = solve(n, method, pruning, mode, heuristic, symmetry)
+        row[f"{prefix}-Max"] = stats.max_open
+        row[f"{prefix}-Enq"] = stats.enqueued
+        row[f"{prefix}-Cls"] = stats.closed
+        row[f"{prefix}-T"] = f"{stats.time_ms:.2f}"
+        if prefix == "BFS":
+            row["Sol"] = 1 if mode == "first" else stats.solutions
+    return row
+
+def run_experiments(min_n=4, max_n=8, pruning="full", mode="all",
+                    symmetry=False, out=None):
+    """
+    Rows for n = min_n..max_n. With out (a path or file object) every
+    row is written as soon as it is done, so a long run can be
+    interrupted without losing the finished sizes.
+    """
+    rows = []
+    f = open(out, "w", newline="") if isinstance(out, str) else out
+    try:
+        writer = None
+        if f is not None:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS,
+                                    lineterminator="\n")
+            writer.writeheader()
+        for n in range(min_n, max_n + 1):
+            row = experiment_row(n, pruning, mode, symmetry)
+            rows.append(row)
+            if writer is not None:
+                writer.writerow(row)
+                f.flush()
+    finally:
+        if isinstance(out, str):
+            f.close()
+    return rows
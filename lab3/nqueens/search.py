@@ -0,0 +1,234 @@
+"""
+BFS, DFS and best-first search for the N-Queens problem over bitboard states.
+
+A state places queens row by row, like NQueensSolver.cs. It is stored as
+one integer: the column of the queen in row i, plus one, is the i-th
+digit of n.bit_length() bits. The open and closed lists therefore hold
+plain ints, and the column/diagonal bitmasks are rebuilt from the key
+when a state is expanded.
+
+With symmetry=True only states that are not larger than their mirror
+image (columns c -> n-1-c) are generated. Mirroring keeps the "first
+k rows filled" shape and all three heuristics, so the search visits
+about half of the states; every solution found that is not its own
+mirror image counts twice in mode="all".
+"""
+
+import time
+from collections import deque, namedtuple
+
+METHODS = ["bfs", "dfs", "bf"]
+PRUNING_LEVELS = ["none", "minimal", "partial", "full"]
+SOLUTION_MODES = ["first", "all"]
+HEURISTICS = ["h1", "h2", "hdod"]
+
+Statistics = namedtuple("Statistics", [
+    "max_open",         # largest open list size after a removal
+    "enqueued",         # states ever added to the open list
+    "closed",           # states in the closed list
+    "time_ms",
+    "solutions",        # number of solutions found
+    "first_solution",   # columns of the first solution, or None
+])
+
+def encode(cols, n):
+    """State key of a list of queen columns, row 0 first."""
+    bits = n.bit_length()
+    key = 0
+    for row, col in enumerate(cols):
+        key |= (col + 1) << (bits * row)
+    return key
+
+def decode(key, n):
+    """Queen columns of a state key, row 0 first."""
+    bits = n.bit_length()
+    digit = (1 << bits) - 1
+    cols = []
+    while key:
+        cols.append((key & digit) - 1)
+        key >>= bits
+    return cols
+
+def h1(n, cols):
+    l = len(cols)
+    sum_wrow = sum(n - row + 1 if row <= n // 2 else row
+                   for row in range(1, l + 1))
+    return (n - l) * sum_wrow
+
+def count_attacks(cols):
+    attacks = 0
+    for i, c1 in enumerate(cols):
+        for j in range(i + 1, len(cols)):
+            c2 = cols[j]
+            if c1 == c2 or abs(c1 - c2) == j - i:
+                attacks += 1
+    return attacks
+
+def h2(n, cols):
+    return count_attacks(cols) + (n - len(cols))
+
+def hdod(n, cols):
+    total = 0
+    for i, c1 in enumerate(cols):
+        for j in range(i + 1, len(cols)):
+            total += abs((j - i) + abs(c1 - cols[j]) - 3)
+    return total
+
+HEURISTIC_FUNCTIONS = {"h1": h1, "h2": h2, "hdod": hdod}
+
+# The open list of best-first search is the 4-ary min-heap of .NET's
+# PriorityQueue<TElement, TPriority>, with the same sift rules. States
+# with equal priority (all states of one depth under H1) then come out
+# in the same order as in NQueensSolver.cs, and so do the statistics.
+HEAP_ARITY = 4
+
+def heap_push(heap, priority, key):
+    heap.append(None)
+    i = len(heap) - 1
+    while i > 0:
+        parent = (i - 1) // HEAP_ARITY
+        if priority >= heap[parent][0]:
+            break
+        heap[i] = heap[parent]
+        i = parent
+    heap[i] = (priority, key)
+
+def heap_pop(heap):
+    """Remove and return the (priority, key) of the root."""
+    root = heap[0]
+    last = heap.pop()
+    size = len(heap)
+    if size:
+        i = 0
+        while True:
+            child = i * HEAP_ARITY + 1
+            if child >= size:
+                break
+            best = child
+            for c in range(child + 1, min(child + HEAP_ARITY, size)):
+                if heap[c][0] < heap[best][0]:
+                    best = c
+            if last[0] <= heap[best][0]:
+                break
+            heap[i] = heap[best]
+            i = best
+        heap[i] = last
+    return root
+
+def solve(n, method="bfs", pruning="full", mode="all", heuristic="h1",
+          symmetry=False):
+    """
+    Search the n-queens states with method ("bfs", "dfs" or "bf" for
+    best-first with heuristic). pruning and mode have the meaning of
+    NQueensSolver.PruningLevel and SolutionMode. Returns Statistics.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Invalid method '{method}', use one of {METHODS}")
+    if pruning not in PRUNING_LEVELS:
+        raise ValueError(f"Invalid pruning level '{pruning}', "
+                         f"use one of {PRUNING_LEVELS}")
+    if mode not in SOLUTION_MODES:
+        raise ValueError(f"Invalid solution mode '{mode}', "
+                         f"use one of {SOLUTION_MODES}")
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Invalid heuristic '{heuristic}', "
+                         f"use one of {HEURISTICS}")
+
+    start = time.perf_counter()
+    bits = n.bit_length()
+    board = (1 << n) - 1
+    # Columns 0..(n-1)/2, the children of a state that is its own mirror
+    half = (1 << ((n + 1) // 2)) - 1
+    # H1 only depends on the number of queens
+    h1_table = [h1(n, [0] * l) for l in range(n + 1)]
+
+    best_first = method == "bf"
+    if best_first:
+        score = HEURISTIC_FUNCTIONS[heuristic]
+        open_list = [(score(n, []), 0)]
+    else:
+        open_list = deque([0])
+        pop = open_list.popleft if method == "bfs" else open_list.pop
+    max_open = enqueued = 1
+    closed = set()
+    solutions = 0
+    first_solution = None
+
+    while open_list:
+        if best_first:
+            h, key = heap_pop(open_list)
+        else:
+            key = pop()
+        max_open = max(max_open, len(open_list))
+
+        if key in closed:
+            continue
+        closed.add(key)
+
+        cols = decode(key, n)
+        l = len(cols)
+        # Bitmasks of the attacked columns of row l
+        col_mask = left = right = 0
+        conflict = False
+        for col in cols:
+            bit = 1 << col
+            if (col_mask | left | right) & bit:
+                conflict = True
+            col_mask |= bit
+            left = ((left | bit) << 1) & board
+            right = (right | bit) >> 1
+        mirror = all(2 * col == n - 1 for col in cols)
+
+        if l == n:
+            if not conflict:
+                if mode == "first":
+                    solutions, first_solution = 1, cols
+                    break
+                solutions += 2 if symmetry and not mirror else 1
+                if first_solution is None:
+                    first_solution = cols
+            continue
+        if pruning == "full" and conflict:
+            continue
+
+        if pruning in ("partial", "full"):
+            free = board & ~(col_mask | left | right)
+        elif pruning == "minimal":
+            free = board & ~col_mask
+        else:
+            free = board
+        if symmetry and mirror:
+            free &= half
+
+        shift = bits * l
+        while free:
+            bit = free & -free
+            free ^= bit
+            col = bit.bit_length() - 1
+            child = key | ((col + 1) << shift)
+            enqueued += 1
+            if not best_first:
+                open_list.append(child)
+                continue
+
+            if heuristic == "h1":
+                h_child = h1_table[l + 1]
+            elif heuristic == "h2":
+                # attacks + queens left, only the new queen can add attacks
+                h_child = h - 1
+                if (col_mask | left | right) & bit:
+                    h_child += sum(1 for row, c in enumerate(cols)
+                                   if c == col or abs(c - col) == l - row)
+            else:
+                h_child = h + sum(abs((l - row) + abs(col - c) - 3)
+                                  for row, c in enumerate(cols))
+            heap_push(open_list, h_child, child)
+
+    return Statistics(
+        max_open=max_open,
+        enqueued=enqueued,
+        closed=len(closed),
+        time_ms=(time.perf_counter() - start) * 1000,
+        solutions=solutions,
+        first_solution=first_solution,
+    )
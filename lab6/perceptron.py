@@ -0,0 +1,203 @@
+"""
+Uczenie perceptronu regułą delta - wersja wektorowa do importu.
+
+Wejścia są rozszerzane o kolumnę jedynek raz, na początku uczenia (waga
+biasu jest ostatnia, jak w "delta part 2.py"). Zamiast przeliczać wyjście
+neuronu dla całego zbioru po każdej aktualizacji, trzymamy wektor
+pobudzeń s = X_e @ w i dodajemy do niego tylko zmianę X_e @ dw. Zbiór E
+źle sklasyfikowanych próbek to maska aktualizowana w miejscu.
+Pamiętana jest tylko bieżąca waga (oraz opcjonalnie co któraś - historia).
+
+train_multistart uruchamia wiele takich uczeń z różnymi ziarnami w puli
+procesów i zwraca najlepszy wynik - dla danych zaszumionych, na których
+pojedyncze uczenie nigdy się nie kończy.
+"""
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Co tyle aktualizacji pobudzenia są liczone od nowa, żeby błędy
+# zaokrągleń z kolejnych dodawań się nie kumulowały
+RESYNC_EVERY = 1000
+
+TrainingResult = namedtuple(
+    "TrainingResult",
+    ["weights", "n_errors", "n_updates", "converged", "stop", "history"],
+)
+TrainingResult.__doc__ = """
+Wynik uczenia:
+- weights: wagi (d + 1,), bias na końcu; w wariancie pocket najlepsze
+  znalezione
+- n_errors: liczba źle sklasyfikowanych próbek dla weights
+- n_updates: liczba wykonanych aktualizacji wag
+- converged: czy zbiór E stał się pusty
+- stop: powód zakończenia - "converged", "max_updates" lub "plateau"
+- history: lista (numer aktualizacji, wagi) co history_every aktualizacji
+"""
+
+
+def augment(x):
+    """
+    Rozszerz wejścia o kolumnę jedynek
+    :param x: macierz wejść (samples, d)
+    :return: macierz (samples, d + 1)
+    """
+    xe = np.empty((x.shape[0], x.shape[1] + 1))
+    xe[:, :-1] = x
+    xe[:, -1] = 1
+    return xe
+
+
+def predict(x, w):
+    """
+    Wyjście neuronu (1 gdy x·w >= 0, w przeciwnym wypadku -1)
+    :param x: macierz wejść (samples, d)
+    :param w: wagi (d + 1,), bias na końcu
+    """
+    return np.where(x @ w[:-1] + w[-1] >= 0, 1, -1)
+
+
+def train(x, y, eta=0.01, batch_size=1, pocket=False, max_updates=None,
+          patience=None, w0=None, history_every=0, rng=None):
+    """
+    Uczenie perceptronu
+    :param x: próbki uczące (samples, d)
+    :param y: klasy (-1, 1)
+    :param eta: współczynnik uczenia
+    :param batch_size: ile losowych próbek z E wchodzi w jedną aktualizację
+        (1 - klasyczna reguła, więcej - mini-batch)
+    :param pocket: zwróć najlepsze wagi zamiast ostatnich (dla danych, które
+        nie są liniowo separowalne)
+    :param max_updates: limit aktualizacji (None - do opróżnienia E)
+    :param patience: zakończ, gdy najmniejsza liczba błędów nie spadła
+        przez tyle aktualizacji (None - bez limitu)
+    :param w0: wagi początkowe (domyślnie zera)
+    :param history_every: co ile aktualizacji zapisać kopię wag (0 - wcale)
+    :param rng: ziarno lub np.random.Generator do losowania próbek z E
+    :return: TrainingResult
+    """
+    rng = np.random.default_rng(rng)
+    xe = augment(x)
+    y = np.asarray(y, dtype=float)
+    positive = y > 0
+
+    w = np.zeros(xe.shape[1]) if w0 is None else np.array(w0, dtype=float)
+    s = xe @ w
+    wrong = np.empty(len(y), dtype=bool)
+    np.not_equal(s >= 0, positive, out=wrong)
+    n_errors = np.count_nonzero(wrong)
+
+    best_w, best_errors, best_k = w.copy(), n_errors, 0
+    history = [(0, w.copy())] if history_every else []
+    k = 0
+    stop = "converged"
+    while n_errors > 0:
+        if max_updates is not None and k >= max_updates:
+            stop = "max_updates"
+            break
+        if patience is not None and k - best_k >= patience:
+            stop = "plateau"
+            break
+        # Losowe próbki ze zbioru E
+        E = np.flatnonzero(wrong)
+        if batch_size == 1:
+            batch = E[rng.integers(len(E))]
+            dw = (eta * y[batch]) * xe[batch]
+        else:
+            batch = rng.choice(E, size=min(batch_size, len(E)),
+                               replace=False)
+            dw = eta * (y[batch] @ xe[batch])
+        w += dw
+        k += 1
+
+        if k % RESYNC_EVERY == 0:
+            np.dot(xe, w, out=s)
+        else:
+            s += xe @ dw
+        np.not_equal(s >= 0, positive, out=wrong)
+        n_errors = np.count_nonzero(wrong)
+        if n_errors == 0:
+            # Potwierdź zbieżność na dokładnie policzonych pobudzeniach
+            np.dot(xe, w, out=s)
+            np.not_equal(s >= 0, positive, out=wrong)
+            n_errors = np.count_nonzero(wrong)
+
+        if n_errors < best_errors:
+            if pocket:
+                best_w[:] = w
+            best_errors, best_k = n_errors, k
+        if history_every and k % history_every == 0:
+            history.append((k, w.copy()))
+
+    if pocket:
+        return TrainingResult(best_w, best_errors, k, n_errors == 0, stop,
+                              history)
+    return TrainingResult(w, n_errors, k, n_errors == 0, stop, history)
+
+
+# Kopia danych w każdym procesie, ustawiana raz przez _init_worker, żeby
+# zadania przenosiły tylko ziarno
+_DATA = {}
+
+
+def train_multistart(x, y, n_runs=8, n_jobs=None, seed=0, max_updates=10000,
+                     patience=2000, **params):
+    """
+    Wiele niezależnych uczeń perceptronu (pocket) z różnymi ziarnami
+    :param x: próbki uczące (samples, d)
+    :param y: klasy (-1, 1)
+    :param n_runs: liczba uczeń
+    :param n_jobs: liczba procesów (domyślnie wszystkie rdzenie, 1 - bez puli)
+    :param seed: ziarno, z którego wyprowadzane są ziarna kolejnych uczeń
+    :param max_updates: limit aktualizacji jednego uczenia
+    :param patience: limit aktualizacji bez poprawy (wykrywanie plateau)
+    :param params: pozostałe argumenty train (eta, batch_size, ...)
+    :return: (najlepszy TrainingResult, lista statystyk każdego uczenia)
+    """
+    seeds = np.random.SeedSequence(seed).spawn(n_runs)
+    params = dict(params, pocket=True, max_updates=max_updates,
+                  patience=patience)
+    tasks = [(run, s, params) for run, s in enumerate(seeds)]
+
+    if n_jobs is None:
+        n_jobs = os.cpu_count()
+    if n_jobs == 1:
+        results = [_run_task(task, x, y) for task in tasks]
+    else:
+        pool = ProcessPoolExecutor(max_workers=n_jobs,
+                                   initializer=_init_worker, initargs=(x, y))
+        with pool:
+            results = list(pool.map(_run_worker_task, tasks))
+
+    runs = [stats for stats, _ in results]
+    # Najmniej błędów, przy remisie mniej aktualizacji, potem numer uczenia
+    best = min(runs, key=lambda r: (r["n_errors"], r["n_updates"], r["run"]))
+    return results[best["run"]][1], runs
+
+
+def _init_worker(x, y):
+    _DATA["x"] = x
+    _DATA["y"] = y
+
+
+def _run_worker_task(task):
+    return _run_task(task, _DATA["x"], _DATA["y"])
+
+
+def _run_task(task, x, y):
+    run, seed, params = task
+    t0 = time.perf_counter()
+    result = train(x, y, rng=np.random.default_rng(seed), **params)
+    stats = {
+        "run": run,
+        "n_errors": int(result.n_errors),
+        "error_rate": result.n_errors / len(y),
+        "n_updates": result.n_updates,
+        "converged": result.converged,
+        "stop": result.stop,
+        "time_s": time.perf_counter() - t0,
+    }
+    return stats, result
@@ -0,0 +1,134 @@
+"""
+Wizualizacja próbek i granicy decyzyjnej perceptronu.
+
+Przy dużej liczbie próbek punkty nie są rysowane pojedynczo: są zliczane
+w komórkach siatki (d=2) albo w wokselach (d=3) i rysowana jest średnia
+etykieta komórki. Czas rysowania zależy wtedy od liczby komórek, a nie
+próbek. Z parametrem out wykres jest zapisywany do pliku przez backend
+Agg, bez otwierania okna (np. na serwerze bez ekranu).
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Powyżej tylu próbek punkty są agregowane w komórkach
+MAX_POINTS = 5000
+# Domyślna liczba komórek na oś
+BINS_2D = 200
+BINS_3D = 20
+
+
+def visualize(inputs, output, d: int, coef=None, out=None,
+              max_points=MAX_POINTS, bins=None):
+    """
+    Narysuj próbki i opcjonalnie granicę decyzyjną
+    :param inputs: macierz wejść (samples, d)
+    :param output: wektor etykiet (-1, 1)
+    :param d: wymiarowość wejścia
+    :param coef: wagi (bias na końcu)
+    :param out: ścieżka pliku z wykresem (None - okno plt.show())
+    :param max_points: powyżej tylu próbek rysuj komórki zamiast punktów
+    :param bins: liczba komórek na oś (domyślnie BINS_2D / BINS_3D)
+    """
+    if d not in (2, 3):
+        print("Nie można zwizualizować danych o więcej niż 3D")
+        return
+
+    if out is None:
+        fig = plt.figure()
+    else:
+        # Figura bez pyplot, rysowana przez Agg niezależnie od backendu
+        fig = Figure()
+        FigureCanvasAgg(fig)
+
+    inputs = np.asarray(inputs)
+    output = np.asarray(output)
+    if d == 2:
+        _draw_2d(fig, inputs, output, coef, max_points, bins or BINS_2D)
+    else:
+        _draw_3d(fig, inputs, output, coef, max_points, bins or BINS_3D)
+
+    if out is None:
+        plt.show()
+    else:
+        fig.savefig(out)
+
+
+def bin_means(points, labels, bins):
+    """
+    Zlicz próbki w siatce bins^d komórek rozpiętej na zakresie danych
+    :return: (lo, hi, liczności, średnia etykieta - NaN dla pustych komórek)
+    """
+    d = points.shape[1]
+    lo = points.min(axis=0)
+    hi = points.max(axis=0)
+    scale = bins / np.where(hi > lo, hi - lo, 1.0)
+
+    # Indeks komórki liczony oś po osi, w jednym buforze
+    flat = np.zeros(len(points), dtype=np.intp)
+    coord = np.empty(len(points))
+    idx = np.empty(len(points), dtype=np.intp)
+    for j in range(d):
+        np.subtract(points[:, j], lo[j], out=coord)
+        coord *= scale[j]
+        np.copyto(idx, coord, casting="unsafe")
+        np.clip(idx, 0, bins - 1, out=idx)
+        flat *= bins
+        flat += idx
+
+    counts = np.bincount(flat, minlength=bins ** d)
+    sums = np.bincount(flat, weights=labels, minlength=bins ** d)
+    with np.errstate(invalid="ignore"):
+        means = sums / counts
+    shape = (bins,) * d
+    return lo, hi, counts.reshape(shape), means.reshape(shape)
+
+
+def _draw_2d(fig, inputs, output, coef, max_points, bins):
+    ax = fig.add_subplot(111)
+    if len(inputs) <= max_points:
+        ax.scatter(inputs[:, 0], inputs[:, 1], c=output)
+    else:
+        lo, hi, _, means = bin_means(inputs, output, bins)
+        image = ax.imshow(means.T, origin="lower", aspect="auto",
+                          extent=(lo[0], hi[0], lo[1], hi[1]),
+                          interpolation="nearest")
+        fig.colorbar(image, ax=ax, label="średnia etykieta")
+    ax.set_xlabel('cecha 1')
+    ax.set_ylabel('cecha 2')
+    if coef is not None:
+        # wzór na granicę decyzyjną
+        # w0 + x1*w1 + x2*w2 = 0
+        # x2 = -(x1*w1 + w0)/w2
+        x = np.linspace(-20, 20, 100)
+        y = -(x * coef[0] + coef[2]) / coef[1]
+        ax.plot(x, y, '-r')
+
+
+def _draw_3d(fig, inputs, output, coef, max_points, bins):
+    ax = fig.add_subplot(111, projection='3d')
+    if len(inputs) <= max_points:
+        ax.scatter(inputs[:, 0], inputs[:, 1], inputs[:, 2], c=output)
+    else:
+        # Jeden punkt na niepusty woksel, w jego środku; rozmiar rośnie
+        # z licznością
+        lo, hi, counts, means = bin_means(inputs, output, bins)
+        cells = np.argwhere(counts > 0)
+        centers = lo + (cells + 0.5) * (hi - lo) / bins
+        n = counts[tuple(cells.T)]
+        points = ax.scatter(centers[:, 0], centers[:, 1], centers[:, 2],
+                            c=means[tuple(cells.T)], s=4 + 36 * n / n.max())
+        fig.colorbar(points, ax=ax, label="średnia etykieta")
+    ax.set_xlabel('cecha 1')
+    ax.set_ylabel('cecha 2')
+    ax.set_zlabel('cecha 3')
+    if coef is not None:
+        # wzrór na płaszczyznę decyzyjną
+        # w0 + x1*w1 + x2*w2 + x3w3 = 0
+        # x3 = -(x1*w1 + x2*w2 + w0)/w3
+        x = np.linspace(-25, 25, 100)
+        y = np.linspace(-25, 25, 100)
+        X, Y = np.meshgrid(x, y)
+        Z = -(X * coef[0] + Y * coef[1] + coef[3]) / coef[2]
+        ax.plot_surface(X, Y, Z, alpha=0.8)
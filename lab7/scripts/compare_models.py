@@ -1,49 +1,193 @@
 #!/usr/bin/env python3
 
+"""
+Compare .NET MLP predictions with an sklearn MLPRegressor fitted with
+the same hyperparameters.
+
+The sklearn fit only depends on the training data and the
+hyperparameters, so fitted models are cached on disk (default:
+.skcache next to the train CSV), keyed by the SHA-256 of the train CSV
+plus the MLPRegressor parameters and the sklearn version. Predictions
+are cached next to the model per test CSV hash. Re-running a sweep
+only fits the configurations that changed; --no-cache always refits.
+
+--eval-only skips sklearn entirely: it reads the test targets and any
+number of prediction CSVs (e.g. --pred 'models/pred_*.csv'), stacks the
+predictions into one (runs, samples) matrix and reports MAE, RMSE, max
+error and R² of every run in one vectorized pass.
+"""
+
 import argparse
+import glob
+import hashlib
+import json
+import os
+
+import joblib
+import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.neural_network import MLPRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+from fileutil import atomic_write, file_hash
+
+# Bumped whenever the cached layout or the fitting code changes
+CACHE_VERSION = 1
+
+def mlp_params(neurons, eta, epochs, batch):
+    return dict(
+        hidden_layer_sizes=(neurons,),
+        activation='logistic',
+        solver='sgd',
+        learning_rate_init=eta,
+        max_iter=epochs,
+        batch_size=batch,
+        shuffle=True,
+        tol=0.0,
+        random_state=0
+    )
+
+def load_xy(path):
+    df = pd.read_csv(path)
+    return df[['x1','x2']], df['y']
+
+def load_targets(path):
+    return pd.read_csv(path, usecols=['y'])['y'].to_numpy()
+
+def load_predictions(paths, n_samples):
+    """(len(paths), n_samples) matrix of the 'y_pred' columns of paths."""
+    P = np.empty((len(paths), n_samples))
+    for i, path in enumerate(paths):
+        pred = pd.read_csv(path, usecols=['y_pred'])['y_pred'].to_numpy()
+        if len(pred) != n_samples:
+            raise ValueError(
+                f"{path} has {len(pred)} predictions, expected {n_samples}"
+            )
+        P[i] = pred
+    return P
+
+def compute_metrics(y, P):
+    """
+    MAE, RMSE, max error and R² of every row of P (runs x samples)
+    against y, as arrays of length len(P).
+    """
+    E = np.atleast_2d(P) - y
+    abs_err = np.abs(E)
+    mae = abs_err.mean(axis=1)
+    max_err = abs_err.max(axis=1)
+    del abs_err
+    mse = np.square(E, out=E).mean(axis=1)
+    sst = np.square(y - y.mean()).sum()
+    return {
+        "MAE": mae,
+        "RMSE": np.sqrt(mse),
+        "max_error": max_err,
+        "R2": 1 - mse * len(y) / sst,
+    }
+
+def evaluate(test_path, pred_patterns):
+    """DataFrame of metrics, one row per prediction file, best MAE first."""
+    paths = sorted({
+        path for pattern in pred_patterns
+        for path in (glob.glob(pattern) or [pattern])
+    })
+    y = load_targets(test_path)
+    metrics = compute_metrics(y, load_predictions(paths, len(y)))
+    runs = [os.path.splitext(os.path.basename(p))[0].removeprefix("pred_")
+            for p in paths]
+    return (pd.DataFrame({"run": runs, **metrics})
+            .sort_values("MAE", ignore_index=True))
+
+def reference_predictions(train_path, test_path, params, cache_dir=None,
+                          cache=True):
+    """
+    Test-set predictions of MLPRegressor(**params) fitted on train_path.
+    Returns (predictions, source) with source "fit", "cached model" or
+    "cached predictions".
+    """
+    if not cache:
+        X_train, y_train = load_xy(train_path)
+        model = MLPRegressor(**params).fit(X_train, y_train)
+        return model.predict(load_xy(test_path)[0]), "fit"
+
+    key = hashlib.sha256(json.dumps({
+        "version": CACHE_VERSION,
+        "sklearn": sklearn.__version__,
+        "train": file_hash(train_path),
+        "params": params,
+    }, sort_keys=True).encode()).hexdigest()[:16]
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(train_path)),
+                                 ".skcache")
+    entry = os.path.join(cache_dir, key)
+    model_path = os.path.join(entry, "model.joblib")
+    pred_path = os.path.join(entry, f"pred_{file_hash(test_path)[:16]}.npy")
+
+    if os.path.exists(pred_path):
+        return np.load(pred_path), "cached predictions"
+    os.makedirs(entry, exist_ok=True)
+    if os.path.exists(model_path):
+        model, source = joblib.load(model_path), "cached model"
+    else:
+        X_train, y_train = load_xy(train_path)
+        model, source = MLPRegressor(**params).fit(X_train, y_train), "fit"
+        atomic_write(model_path, lambda f: joblib.dump(model, f))
+    pred = model.predict(load_xy(test_path)[0])
+    atomic_write(pred_path, lambda f: np.save(f, pred))
+    return pred, source
 
 def main():
     p = argparse.ArgumentParser(
         description="Compare .NET MLP predictions vs sklearn MLPRegressor"
     )
-    p.add_argument("--train",      required=True, help="train CSV (x1,x2,y)")
+    p.add_argument("--train",      help="train CSV (x1,x2,y)")
     p.add_argument("--test",       required=True, help="test  CSV (x1,x2,y)")
-    p.add_argument("--dotnet-pred",required=True,
+    p.add_argument("--dotnet-pred",
                    help="CSV of .NET predictions with header 'y_pred'")
-    p.add_argument("--neurons",    type=int,   required=True)
-    p.add_argument("--eta",        type=float, required=True)
-    p.add_argument("--epochs",     type=int,   required=True)
+    p.add_argument("--neurons",    type=int)
+    p.add_argument("--eta",        type=float)
+    p.add_argument("--epochs",     type=int)
     p.add_argument("--batch",      type=int,   default=32)
+    p.add_argument("--cache-dir",  default=None,
+                   help="sklearn model cache (default: .skcache next to --train)")
+    p.add_argument("--no-cache",   action="store_true",
+                   help="always refit the sklearn model")
+    p.add_argument("--eval-only",  action="store_true",
+                   help="only score the --pred files, no sklearn model")
+    p.add_argument("--pred",       nargs="+", default=[],
+                   help="prediction CSVs or glob patterns for --eval-only")
+    p.add_argument("--out",        default=None,
+                   help="CSV file for the --eval-only metrics table")
     args = p.parse_args()
 
-    train = pd.read_csv(args.train)
-    test  = pd.read_csv(args.test)
-    X_train, y_train = train[['x1','x2']], train['y']
-    X_test,  y_test  = test[['x1','x2']],  test['y']
+    if args.eval_only:
+        if not args.pred:
+            p.error("--eval-only needs --pred")
+        results = evaluate(args.test, args.pred)
+        print(results.to_string(index=False))
+        if args.out:
+            results.to_csv(args.out, index=False)
+            print(f"Saved {len(results)} results to '{args.out}'")
+        return
+    missing = [name for name in ("train", "dotnet_pred", "neurons", "eta",
+                                 "epochs") if getattr(args, name) is None]
+    if missing:
+        p.error("the following arguments are required: " +
+                ", ".join("--" + m.replace("_", "-") for m in missing))
 
+    y_test = load_targets(args.test)
     dotnet_pred = pd.read_csv(args.dotnet_pred)['y_pred'].values
 
-    skl = MLPRegressor(
-        hidden_layer_sizes=(args.neurons,),
-        activation='logistic',
-        solver='sgd',
-        learning_rate_init=args.eta,
-        max_iter=args.epochs,
-        batch_size=args.batch,
-        shuffle=True,
-        tol=0.0,
-        random_state=0
+    params = mlp_params(args.neurons, args.eta, args.epochs, args.batch)
+    skl_pred, source = reference_predictions(
+        args.train, args.test, params,
+        cache_dir=args.cache_dir, cache=not args.no_cache,
     )
-    skl.fit(X_train, y_train)
-    skl_pred = skl.predict(X_test)
+    print(f"sklearn model: {source}")
 
-    for name, pred in [('sklearn', skl_pred), ('.NET', dotnet_pred)]:
-        mae  = mean_absolute_error(y_test, pred)
-        mse = mean_squared_error(y_test, pred)
-        rmse = mse ** 0.5
+    metrics = compute_metrics(y_test, np.vstack([skl_pred, dotnet_pred]))
+    for i, name in enumerate(['sklearn', '.NET']):
+        mae, rmse = metrics["MAE"][i], metrics["RMSE"][i]
         print(f"{name:8s} MAE={mae:.6f}, RMSE={rmse:.6f}")
 
 if __name__ == "__main__":
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+"""
+File helpers shared by the lab7 scripts.
+"""
+
+import hashlib
+import os
+import tempfile
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 hex digest of the file at path."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def atomic_write(path, write, mode="wb"):
+    """
+    Call write(f) on a temporary file in the directory of path, then
+    rename it to path. Parallel or interrupted runs of the sweep only
+    ever see the old file or the complete new one.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
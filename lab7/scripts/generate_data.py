@@ -1,22 +1,117 @@
 #!/usr/bin/env python3
 
+"""
+Generate (x1, x2, y) samples with (x1, x2) ~ U([0,π]^2).
+
+Usage:
+    python3 generate_data.py [--m M] [--out train.csv|train.npy]
+                             [--function NAME] [--seed S] [--chunk ROWS]
+                             [--jobs J]
+
+Rows are produced in chunks of --chunk rows and written as they are
+ready, so memory does not depend on --m. Output is CSV (header x1,x2,y)
+or, for a .npy path, an (M, 3) float64 array that can be opened with
+np.load(path, mmap_mode='r'). Every chunk draws from its own child of
+np.random.SeedSequence(--seed), so with a seed the file is the same for
+any --jobs and chunks can be generated by parallel processes.
+"""
+
+import argparse
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-import argparse
+from numpy.lib.format import open_memmap
+
+# Rows per chunk
+CHUNK_ROWS = 1 << 20
 
 def f(x1, x2):
     return np.cos(x1 * x2) * np.cos(2 * x1)
 
-def main(m, out_csv):
-    x1 = np.random.rand(m) * np.pi
-    x2 = np.random.rand(m) * np.pi
-    y = f(x1, x2)
-    df = pd.DataFrame({"x1": x1, "x2": x2, "y": y})
-    df.to_csv(out_csv, index=False)
+def sin_product(x1, x2):
+    return np.sin(x1) * np.sin(x2)
+
+def saddle(x1, x2):
+    return (x1 - np.pi / 2) ** 2 - (x2 - np.pi / 2) ** 2
+
+def ripple(x1, x2):
+    return np.sin(x1 ** 2 + x2 ** 2)
+
+# Target functions by name; "cos" is the lab task
+FUNCTIONS = {
+    "cos": f,
+    "sin": sin_product,
+    "saddle": saddle,
+    "ripple": ripple,
+}
+
+def make_chunk(n, seed, function="cos"):
+    """(n, 3) array of x1, x2, y drawn from its own seed."""
+    rng = np.random.default_rng(seed)
+    chunk = np.empty((n, 3))
+    chunk[:, 0] = rng.random(n) * np.pi
+    chunk[:, 1] = rng.random(n) * np.pi
+    chunk[:, 2] = FUNCTIONS[function](chunk[:, 0], chunk[:, 1])
+    return chunk
+
+def _csv_chunk(task):
+    n, seed, function = task
+    buf = io.StringIO()
+    pd.DataFrame(make_chunk(n, seed, function)).to_csv(
+        buf, header=False, index=False
+    )
+    return buf.getvalue()
+
+def _npy_chunk(task):
+    path, start, n, seed, function = task
+    out = np.load(path, mmap_mode="r+")
+    out[start:start + n] = make_chunk(n, seed, function)
+    out.flush()
+
+def main(m, out_path, function="cos", seed=None, chunk_rows=CHUNK_ROWS,
+         jobs=1):
+    starts = range(0, m, chunk_rows)
+    sizes = [min(chunk_rows, m - start) for start in starts]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs != 1 else None
+    run = map if pool is None else pool.map
+    try:
+        if out_path.endswith(".npy"):
+            open_memmap(out_path, mode="w+", dtype=np.float64, shape=(m, 3))
+            tasks = [(out_path, start, n, s, function)
+                     for start, n, s in zip(starts, sizes, seeds)]
+            for _ in run(_npy_chunk, tasks):
+                pass
+        else:
+            tasks = [(n, s, function) for n, s in zip(sizes, seeds)]
+            window = max(1, 2 * (jobs or os.cpu_count()))
+            with open(out_path, "w", newline="") as out:
+                out.write("x1,x2,y\n")
+                # A bounded window of chunks in flight, written in order
+                for i in range(0, len(tasks), window):
+                    for text in run(_csv_chunk, tasks[i:i + window]):
+                        out.write(text)
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--m", type=int, default=1000)
-    p.add_argument("--out", default="../data/train.csv")
+    p.add_argument("--out", default="../data/train.csv",
+                   help="output .csv or .npy (default ../data/train.csv)")
+    p.add_argument("--function", choices=list(FUNCTIONS), default="cos",
+                   help="target function (default cos: cos(x1*x2)*cos(2*x1))")
+    p.add_argument("--seed", type=int, default=None,
+                   help="seed for reproducible output (default: random)")
+    p.add_argument("--chunk", type=int, default=CHUNK_ROWS,
+                   help=f"rows per chunk (default {CHUNK_ROWS})")
+    p.add_argument("--jobs", "-j", type=int, default=1,
+                   help="worker processes generating chunks (default 1)")
     args = p.parse_args()
-    main(args.m, args.out)
+    main(args.m, args.out, function=args.function, seed=args.seed,
+         chunk_rows=args.chunk, jobs=args.jobs)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+"""
+Batched NumPy inference for the one-hidden-layer MLP trained by
+MlpRegression (V.csv / W.csv).
+
+    V: (N, 3)   hidden weights, column 0 is the hidden bias
+    W: (N+1,)   output weights, W[0] is the output bias
+
+The biases are folded into the weights: each tile of inputs is copied
+into a buffer whose first column is fixed at 1, and the hidden
+activations are written next to a fixed column of 1s, so both layers
+are a single matrix product. Inputs are scored in tiles of tile_rows
+rows through buffers allocated once, so memory does not grow with the
+number of points. dtype=np.float32 halves the buffers and speeds up the
+products at the cost of ~1e-6 relative error.
+
+Usage as a script:
+    python3 mlp_inference.py --V V.csv --W W.csv --input X.csv [--out pred.csv]
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+
+# Rows scored per tile
+TILE_ROWS = 8192
+
+def load_weights(v_path, w_path):
+    V = pd.read_csv(v_path, header=None).values         # shape (N, 3)
+    W = pd.read_csv(w_path, header=None).values.ravel() # shape (N+1,)
+    return V, W
+
+def sigmoid(z, out=None, tmp=None):
+    """
+    Logistic function without overflow: exp is only taken of -|z|.
+    out and tmp are optional buffers shaped like z (out may be z).
+    """
+    if tmp is None:
+        tmp = np.empty_like(z)
+    negative = z < 0
+    np.abs(z, out=tmp)
+    np.negative(tmp, out=tmp)
+    np.exp(tmp, out=tmp)                        # e = exp(-|z|), in (0, 1]
+    out = np.add(tmp, 1, out=out)
+    np.reciprocal(out, out=out)                 # 1 / (1 + e)
+    np.multiply(out, tmp, out=out, where=negative)  # e / (1 + e) for z < 0
+    return out
+
+class MLP:
+    """
+    Scores inputs against fixed V, W. predict reuses the instance's
+    buffers, so use one instance per thread.
+    """
+
+    def __init__(self, V, W, dtype=np.float64, tile_rows=TILE_ROWS):
+        V = np.asarray(V, dtype=dtype)
+        W = np.asarray(W, dtype=dtype).ravel()
+        n_hidden, n_in = V.shape
+        if W.shape != (n_hidden + 1,):
+            raise ValueError(
+                f"W has shape {W.shape}, expected ({n_hidden + 1},) for "
+                f"V of shape {V.shape}"
+            )
+        self.dtype = np.dtype(dtype)
+        self.n_inputs = n_in - 1
+        self.tile_rows = tile_rows
+        self.Vt = np.ascontiguousarray(V.T)     # (1 + inputs, N)
+        self.W = W
+
+        # [1 | x] and [1 | sigmoid(x V^T)] buffers for one tile
+        self._x = np.empty((tile_rows, n_in), dtype=dtype)
+        self._x[:, 0] = 1
+        self._h = np.empty((tile_rows, n_hidden + 1), dtype=dtype)
+        self._h[:, 0] = 1
+        self._tmp = np.empty((tile_rows, n_hidden), dtype=dtype)
+
+    @classmethod
+    def from_csv(cls, v_path, w_path, **kwargs):
+        return cls(*load_weights(v_path, w_path), **kwargs)
+
+    def predict(self, X, out=None):
+        """Network output for X of shape (M, inputs); out receives it if given."""
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_inputs:
+            raise ValueError(
+                f"X must have shape (M, {self.n_inputs}), got {X.shape}"
+            )
+        if out is None:
+            out = np.empty(X.shape[0], dtype=self.dtype)
+
+        for start in range(0, X.shape[0], self.tile_rows):
+            stop = min(start + self.tile_rows, X.shape[0])
+            m = stop - start
+            x = self._x[:m]
+            x[:, 1:] = X[start:stop]
+            z = self._tmp[:m]
+            np.matmul(x, self.Vt, out=z)
+            h = self._h[:m]
+            sigmoid(z, out=h[:, 1:], tmp=z)
+            np.matmul(h, self.W, out=out[start:stop])
+        return out
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Score a CSV of inputs with MlpRegression weights"
+    )
+    p.add_argument("--V", required=True)
+    p.add_argument("--W", required=True)
+    p.add_argument("--input", required=True,
+                   help="CSV with columns x1,x2 (other columns are ignored)")
+    p.add_argument("--out", default="pred.csv",
+                   help="output CSV with header 'y_pred' (default pred.csv)")
+    p.add_argument("--float32", action="store_true")
+    args = p.parse_args()
+
+    mlp = MLP.from_csv(args.V, args.W,
+                       dtype=np.float32 if args.float32 else np.float64)
+    X = pd.read_csv(args.input, usecols=["x1", "x2"]).values
+    pd.DataFrame({"y_pred": mlp.predict(X)}).to_csv(args.out, index=False)
+    print(f"Saved {len(X)} predictions to '{args.out}'")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ Loads V,W and plots the true vs. learned surface over [0,π]^2.
 
 Usage:
     python3 plot_surface.py --V V.csv --W W.csv [--grid N] [--out file.png] [--show]
+    python3 plot_surface.py --V-dir models/V --W-dir models/W --out-dir surfaces
+                            [--grid N] [--jobs J] [--force]
 
 Arguments:
     --V       Path to hidden-layer weight matrix CSV.
@@ -12,54 +14,87 @@ Arguments:
     --grid    Number of points per axis (default: 50).
     --out     Path where to save the figure (default: surface.png).
     --show    If given, display interactively instead of saving.
+    --max-mesh  Largest mesh drawn per axis (default: 100, 0 = no limit).
+
+Grids up to --max-mesh points per axis are drawn as before: every grid
+point in the surface and the scatter plot. Larger grids are still
+evaluated at full resolution, but drawn with level of detail: the
+surfaces use a decimated mesh of at most --max-mesh points per axis and
+the scatter figure shows the decimated prediction next to a rasterized
+heatmap of |ŷ - f| over the full grid, titled with the full-grid MAE,
+RMSE and max error. The drawing cost then no longer grows with --grid.
+
+Batch mode (--V-dir/--W-dir/--out-dir) renders every run V_<run>.csv /
+W_<run>.csv into surf_<run>.png and scatter_<run>.png, as named by
+run_experiments.sh. The true surface is computed once and the runs are
+rendered by --jobs worker processes with the Agg backend. The --grid
+and --max-mesh of each run are recorded in render_<run>.json; runs whose
+images are newer than both weight files and were rendered with the same
+settings are skipped unless --force.
 """
 
 import argparse
+import glob
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-def load_weights(v_path, w_path):
-    V = pd.read_csv(v_path, header=None).values         # shape (N, 3)
-    W = pd.read_csv(w_path, header=None).values.ravel() # shape (N+1,)
-    return V, W
+from fileutil import atomic_write
+from mlp_inference import MLP, load_weights
 
-def sigmoid(z):
-    return 1.0 / (1.0 + np.exp(-z))
+# Largest mesh drawn per axis before switching to level of detail
+MAX_MESH = 100
+
+# Grid and true surface, set once per worker process by _init_worker
+_GRID = {}
 
 def mlp_predict(V, W, X):
-    M = X.shape[0]
-    Xb = np.hstack([np.ones((M,1)), X]) # (M,3)
-    H = sigmoid(Xb.dot(V.T))            # (M,N)
-    Hb = np.hstack([np.ones((M,1)), H]) # (M,N+1)
-    return Hb.dot(W)                    # (M,)
+    return MLP(V, W).predict(X)         # (M,)
 
 def true_function(X1, X2):
     return np.cos(X1 * X2) * np.cos(2 * X1)
 
-if __name__ == "__main__":
-    p = argparse.ArgumentParser()
-    p.add_argument('--V', required=True)
-    p.add_argument('--W', required=True)
-    p.add_argument('--grid', type=int, default=50)
-    p.add_argument('--out', nargs=2, metavar=('SURF','SCAT'),
-                   help="output files: surface.png scatter.png",
-                   default=['surface.png','scatter.png'])
-    p.add_argument('--show', action='store_true')
-    args = p.parse_args()
-
-    V, W = load_weights(args.V, args.W)
-
-    xs = np.linspace(0, np.pi, args.grid)
-    ys = np.linspace(0, np.pi, args.grid)
+def make_grid(n):
+    xs = np.linspace(0, np.pi, n)
+    ys = np.linspace(0, np.pi, n)
     X1, X2 = np.meshgrid(xs, ys)
     XY = np.column_stack([X1.ravel(), X2.ravel()])
+    return X1, X2, XY, true_function(X1, X2)
 
-    Z_true = true_function(X1, X2)
-    Z_pred = mlp_predict(V, W, XY).reshape(args.grid, args.grid)
+def decimate(n, max_points):
+    """Indices of at most about max_points of range(n), ends included."""
+    step = math.ceil(n / max_points)
+    return np.unique(np.r_[np.arange(0, n, step), n - 1])
+
+def error_stats(Z_true, Z_pred):
+    err = np.abs(Z_pred - Z_true)
+    return {"MAE": err.mean(), "RMSE": np.sqrt(np.mean(err ** 2)),
+            "max": err.max()}
+
+def render(X1, X2, Z_true, Z_pred, surf_path, scat_path, max_mesh=MAX_MESH):
+    # Figures on an Agg canvas, independent of the pyplot backend
+    lod = bool(max_mesh) and max(X1.shape) > max_mesh
+    if lod:
+        mesh = np.ix_(decimate(X1.shape[0], max_mesh),
+                      decimate(X1.shape[1], max_mesh))
+    else:
+        mesh = (slice(None), slice(None))
+    x1, x2 = X1[mesh], X2[mesh]
 
-    # Surface plots
-    fig = plt.figure(figsize=(12,6))
+    plot_surfaces(x1, x2, Z_true[mesh], Z_pred[mesh], surf_path)
+    if lod:
+        plot_error_scatter(X1, X2, Z_true, Z_pred, mesh, scat_path)
+    else:
+        plot_scatter(X1, X2, Z_true, Z_pred, scat_path)
+
+def plot_surfaces(X1, X2, Z_true, Z_pred, path):
+    fig = Figure(figsize=(12,6))
+    FigureCanvasAgg(fig)
     ax1 = fig.add_subplot(1,2,1, projection='3d')
     ax1.plot_surface( X1, X2, Z_true, rstride=1, cstride=1, edgecolor='none' )
     ax1.set_title('True function');    ax1.set_xlabel('x1'); ax1.set_ylabel('x2'); ax1.set_zlabel('f(x1,x2)')
@@ -67,11 +102,11 @@ if __name__ == "__main__":
     ax2.plot_surface( X1, X2, Z_pred, rstride=1, cstride=1, edgecolor='none' )
     ax2.set_title('MLP prediction'); ax2.set_xlabel('x1'); ax2.set_ylabel('x2'); ax2.set_zlabel('ŷ(x1,x2)')
     fig.tight_layout()
-    plt.savefig(args.out[0], dpi=150)
-    print(f"Saved surface plot to '{args.out[0]}'")
+    fig.savefig(path, dpi=150)
 
-    # Scatter plots
-    fig2 = plt.figure(figsize=(12,6))
+def plot_scatter(X1, X2, Z_true, Z_pred, path):
+    fig2 = Figure(figsize=(12,6))
+    FigureCanvasAgg(fig2)
     ax3 = fig2.add_subplot(1,2,1, projection='3d')
     ax3.scatter( X1.ravel(), X2.ravel(), Z_true.ravel(), marker='.', alpha=0.7 )
     ax3.set_title('True function (scatter)');    ax3.set_xlabel('x1'); ax3.set_ylabel('x2'); ax3.set_zlabel('f(x1,x2)')
@@ -79,5 +114,140 @@ if __name__ == "__main__":
     ax4.scatter( X1.ravel(), X2.ravel(), Z_pred.ravel(), marker='.', alpha=0.7 )
     ax4.set_title('MLP prediction (scatter)'); ax4.set_xlabel('x1'); ax4.set_ylabel('x2'); ax4.set_zlabel('ŷ(x1,x2)')
     fig2.tight_layout()
-    plt.savefig(args.out[1], dpi=150)
+    fig2.savefig(path, dpi=150)
+
+def plot_error_scatter(X1, X2, Z_true, Z_pred, mesh, path):
+    """Prediction on the decimated mesh next to the error over the full grid."""
+    x1, x2 = X1[mesh], X2[mesh]
+    stats = error_stats(Z_true, Z_pred)
+    fig2 = Figure(figsize=(12,6))
+    FigureCanvasAgg(fig2)
+    ax3 = fig2.add_subplot(1,2,1, projection='3d')
+    ax3.scatter( x1.ravel(), x2.ravel(), Z_pred[mesh].ravel(), marker='.', alpha=0.7 )
+    ax3.set_title('MLP prediction (scatter)'); ax3.set_xlabel('x1'); ax3.set_ylabel('x2'); ax3.set_zlabel('ŷ(x1,x2)')
+    ax4 = fig2.add_subplot(1,2,2)
+    im = ax4.imshow( np.abs(Z_pred - Z_true), origin='lower', aspect='auto',
+                     extent=(X1.min(), X1.max(), X2.min(), X2.max()),
+                     interpolation='nearest', rasterized=True )
+    fig2.colorbar(im, ax=ax4, label='|ŷ - f|')
+    ax4.set_title(f"|ŷ - f| on {X1.shape[0]}x{X1.shape[1]} grid\n"
+                  f"MAE={stats['MAE']:.4f}, RMSE={stats['RMSE']:.4f}, "
+                  f"max={stats['max']:.4f}")
+    ax4.set_xlabel('x1'); ax4.set_ylabel('x2')
+    fig2.tight_layout()
+    fig2.savefig(path, dpi=150)
+
+def find_runs(v_dir, w_dir, out_dir):
+    """
+    (run, V path, W path, surface path, scatter path, settings path) for
+    every V_<run>.csv with a W.
+    """
+    runs = []
+    for v_path in sorted(glob.glob(os.path.join(v_dir, "V_*.csv"))):
+        run = os.path.basename(v_path)[len("V_"):-len(".csv")]
+        w_path = os.path.join(w_dir, f"W_{run}.csv")
+        if not os.path.exists(w_path):
+            print(f"Skipping {run}: no {w_path}")
+            continue
+        runs.append((
+            run, v_path, w_path,
+            os.path.join(out_dir, f"surf_{run}.png"),
+            os.path.join(out_dir, f"scatter_{run}.png"),
+            os.path.join(out_dir, f"render_{run}.json"),
+        ))
+    return runs
+
+def is_up_to_date(run, settings):
+    _, v_path, w_path, surf_path, scat_path, settings_path = run
+    if not (os.path.exists(surf_path) and os.path.exists(scat_path)):
+        return False
+    try:
+        with open(settings_path) as f:
+            if json.load(f) != settings:
+                return False
+    except (OSError, ValueError):
+        return False
+    newest_input = max(os.path.getmtime(v_path), os.path.getmtime(w_path))
+    oldest_output = min(os.path.getmtime(surf_path),
+                        os.path.getmtime(scat_path))
+    return oldest_output > newest_input
+
+def render_batch(v_dir, w_dir, out_dir, grid=50, jobs=None, force=False,
+                 max_mesh=MAX_MESH):
+    os.makedirs(out_dir, exist_ok=True)
+    runs = find_runs(v_dir, w_dir, out_dir)
+    settings = {"grid": grid, "max_mesh": max_mesh}
+    todo = [r for r in runs if force or not is_up_to_date(r, settings)]
+    print(f"{len(runs)} runs, {len(runs) - len(todo)} up to date, "
+          f"rendering {len(todo)}")
+    if not todo:
+        return
+
+    X1, X2, XY, Z_true = make_grid(grid)
+    if jobs == 1:
+        grid_data = dict(X1=X1, X2=X2, XY=XY, Z_true=Z_true,
+                         max_mesh=max_mesh)
+        done = (_render_run(run, grid_data) for run in todo)
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(X1, X2, XY, Z_true, max_mesh))
+        with pool:
+            done = list(pool.map(_render_worker_run, todo))
+    for run, name in zip(todo, done):
+        # Written once both images are saved
+        atomic_write(run[-1], lambda f: json.dump(settings, f), mode="w")
+        print(f"Saved surfaces for {name}")
+
+def _init_worker(X1, X2, XY, Z_true, max_mesh):
+    _GRID.update(X1=X1, X2=X2, XY=XY, Z_true=Z_true, max_mesh=max_mesh)
+
+def _render_worker_run(run):
+    return _render_run(run, _GRID)
+
+def _render_run(run, grid):
+    name, v_path, w_path, surf_path, scat_path, _ = run
+    V, W = load_weights(v_path, w_path)
+    X1 = grid["X1"]
+    Z_pred = mlp_predict(V, W, grid["XY"]).reshape(X1.shape)
+    render(X1, grid["X2"], grid["Z_true"], Z_pred, surf_path, scat_path,
+           max_mesh=grid["max_mesh"])
+    return name
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument('--V')
+    p.add_argument('--W')
+    p.add_argument('--grid', type=int, default=50)
+    p.add_argument('--out', nargs=2, metavar=('SURF','SCAT'),
+                   help="output files: surface.png scatter.png",
+                   default=['surface.png','scatter.png'])
+    p.add_argument('--show', action='store_true')
+    p.add_argument('--max-mesh', type=int, default=MAX_MESH,
+                   help="largest mesh drawn per axis; larger grids are "
+                        f"decimated (default {MAX_MESH}, 0 = no limit)")
+    p.add_argument('--V-dir', help="batch mode: directory of V_<run>.csv")
+    p.add_argument('--W-dir', help="batch mode: directory of W_<run>.csv")
+    p.add_argument('--out-dir', help="batch mode: directory for the images")
+    p.add_argument('--jobs', '-j', type=int, default=None,
+                   help="batch mode: worker processes (default: all cores)")
+    p.add_argument('--force', action='store_true',
+                   help="batch mode: re-render up-to-date runs too")
+    args = p.parse_args()
+
+    batch = (args.V_dir, args.W_dir, args.out_dir)
+    if any(batch):
+        if not all(batch):
+            p.error("batch mode needs --V-dir, --W-dir and --out-dir")
+        render_batch(*batch, grid=args.grid, jobs=args.jobs, force=args.force,
+                     max_mesh=args.max_mesh)
+        raise SystemExit
+    if not (args.V and args.W):
+        p.error("--V and --W are required (or use batch mode)")
+
+    V, W = load_weights(args.V, args.W)
+    X1, X2, XY, Z_true = make_grid(args.grid)
+    Z_pred = mlp_predict(V, W, XY).reshape(args.grid, args.grid)
+
+    render(X1, X2, Z_true, Z_pred, *args.out, max_mesh=args.max_mesh)
+    print(f"Saved surface plot to '{args.out[0]}'")
     print(f"Saved scatter plot to '{args.out[1]}'")
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+"""
+Run the lab7 experiment grid (neurons x eta x epochs).
+
+Usage:
+    python3 scripts/run_experiments.py [--neurons N ...] [--eta E ...]
+                                       [--epochs EP ...] [--batch B]
+                                       [--jobs J] [--results results.csv]
+                                       [--no-plot] [--dotnet CMD]
+
+Every configuration goes through the stages train -> test -> compare
+(.NET training, .NET test predictions, compare_models.py) in its own
+worker; --jobs configurations run at the same time. Data is generated
+once up front and the surfaces of all runs are rendered at the end with
+plot_surface.py's batch mode.
+
+Finished stages are recorded in logs/manifest/<run>.json. Re-running
+the script skips every stage that finished with the same configuration
+and whose outputs still exist, so an interrupted or partly failed sweep
+resumes where it stopped. The compare_models.py metrics of all runs are
+collected into one table (--results, default results.csv).
+
+Paths are the ones run_experiments.sh used, relative to the lab7
+directory: data/, models/V, models/W, models/pred_<run>.csv, surfaces/,
+logs/.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from fileutil import atomic_write
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+LAB_DIR = os.path.dirname(SCRIPTS_DIR)
+
+NEURONS = [25, 50, 100, 150]
+ETAS = [0.05, 0.1, 0.5]
+EPOCHS = [50000, 100000, 500000]
+TRAIN_ROWS = 1000
+TEST_ROWS = 10000
+
+STAGES = ["train", "test", "compare"]
+# "sklearn  MAE=0.438879, RMSE=0.539368" lines of compare_models.py
+METRICS_LINE = re.compile(r"^(\S+)\s+MAE=(\S+), RMSE=(\S+)$")
+
+def run_name(neurons, eta, epochs):
+    return f"n{neurons}_e{eta}_ep{epochs}"
+
+class Paths:
+    def __init__(self, root):
+        self.root = root
+        self.data = os.path.join(root, "data")
+        self.train = os.path.join(self.data, "train.csv")
+        self.test = os.path.join(self.data, "test.csv")
+        self.V_dir = os.path.join(root, "models", "V")
+        self.W_dir = os.path.join(root, "models", "W")
+        self.surfaces = os.path.join(root, "surfaces")
+        self.logs = os.path.join(root, "logs")
+        self.manifest = os.path.join(self.logs, "manifest")
+
+    def makedirs(self):
+        for d in (self.data, self.V_dir, self.W_dir, self.surfaces,
+                  self.manifest):
+            os.makedirs(d, exist_ok=True)
+
+    def run(self, run):
+        return {
+            "V": os.path.join(self.V_dir, f"V_{run}.csv"),
+            "W": os.path.join(self.W_dir, f"W_{run}.csv"),
+            "pred": os.path.join(self.root, "models", f"pred_{run}.csv"),
+            "log": os.path.join(self.logs, f"train_test_{run}.log"),
+        }
+
+class Manifest:
+    """Finished stages of one run, stored in <manifest dir>/<run>.json."""
+
+    def __init__(self, directory, run, config):
+        self.path = os.path.join(directory, f"{run}.json")
+        self.config = config
+        self.stages = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                record = json.load(f)
+            # A different configuration under the same name starts over
+            if record.get("config") == config:
+                self.stages = record["stages"]
+
+    def is_done(self, stage, outputs=()):
+        return (stage in self.stages
+                and all(os.path.exists(p) for p in outputs))
+
+    def record(self, stage, **info):
+        self.stages[stage] = dict(info, finished=time.time())
+        self._save()
+
+    def _save(self):
+        record = {"config": self.config, "stages": self.stages}
+        atomic_write(self.path, lambda f: json.dump(record, f, indent=2),
+                     mode="w")
+
+class Runner:
+    def __init__(self, paths, dotnet):
+        self.paths = paths
+        self.dotnet = shlex.split(dotnet)
+        self.project = os.path.join(paths.root, "MlpRegression")
+        self._build_lock = threading.Lock()
+        self._built = False
+
+    def generate_data(self, seed):
+        for path, rows, offset in ((self.paths.train, TRAIN_ROWS, 0),
+                                   (self.paths.test, TEST_ROWS, 1)):
+            if os.path.exists(path):
+                continue
+            print(f"Generating {path}...")
+            subprocess.run([
+                sys.executable, os.path.join(SCRIPTS_DIR, "generate_data.py"),
+                "--m", str(rows), "--out", path, "--seed", str(seed + offset),
+            ], check=True)
+
+    def build(self, log):
+        # Build once, so that concurrent runs do not rebuild the same
+        # project on top of each other
+        with self._build_lock:
+            if not self._built:
+                self._call(self.dotnet + ["build", self.project], log)
+                self._built = True
+
+    def run_config(self, config):
+        """Run the stages of one configuration; returns its metrics rows."""
+        run = run_name(config["neurons"], config["eta"], config["epochs"])
+        files = self.paths.run(run)
+        manifest = Manifest(self.paths.manifest, run, config)
+        params = [
+            "--neurons", str(config["neurons"]),
+            "--eta", str(config["eta"]),
+            "--epochs", str(config["epochs"]),
+            "--batch", str(config["batch"]),
+        ]
+
+        with open(files["log"], "a") as log:
+            log.write(f"=== RUN {run} ===\n")
+            # Once a stage runs, every later stage has to run again
+            rerun = False
+
+            if rerun or not manifest.is_done("train", [files["V"], files["W"]]):
+                rerun = True
+                self.build(log)
+                start = time.perf_counter()
+                self._call(self._dotnet_run(
+                    "--mode", "train", "--data", self.paths.train, *params,
+                    "--V", files["V"], "--W", files["W"],
+                ), log, outputs=[files["V"], files["W"]])
+                manifest.record("train", seconds=time.perf_counter() - start)
+
+            if rerun or not manifest.is_done("test", [files["pred"]]):
+                rerun = True
+                self.build(log)
+                start = time.perf_counter()
+                self._call(self._dotnet_run(
+                    "--mode", "test", "--test", self.paths.test,
+                    "--V", files["V"], "--W", files["W"],
+                ), log, stdout_path=files["pred"])
+                manifest.record("test", seconds=time.perf_counter() - start)
+
+            if rerun or not manifest.is_done("compare"):
+                start = time.perf_counter()
+                output = self._call([
+                    sys.executable,
+                    os.path.join(SCRIPTS_DIR, "compare_models.py"),
+                    "--train", self.paths.train, "--test", self.paths.test,
+                    "--dotnet-pred", files["pred"], *params,
+                ], log, capture=True)
+                manifest.record("compare",
+                                seconds=time.perf_counter() - start,
+                                metrics=parse_metrics(output))
+            log.write(f"=== END RUN {run} ===\n\n")
+
+        return [
+            dict(run=run, **config, **m)
+            for m in manifest.stages["compare"]["metrics"]
+        ]
+
+    def _dotnet_run(self, *args):
+        return self.dotnet + ["run", "--no-build", "--project", self.project,
+                              "--", *args]
+
+    def _call(self, cmd, log, outputs=(), stdout_path=None, capture=False):
+        log.write(f"$ {shlex.join(cmd)}\n")
+        log.flush()
+        if stdout_path is not None:
+            # Into a temporary file first, so a failed run leaves no output
+            tmp = stdout_path + ".tmp"
+            with open(tmp, "w") as out:
+                subprocess.run(cmd, stdout=out, stderr=log,
+                               cwd=self.paths.root, check=True)
+            os.replace(tmp, stdout_path)
+            return None
+        result = subprocess.run(
+            cmd, stdout=subprocess.PIPE if capture else log, stderr=log,
+            cwd=self.paths.root, check=True, text=True,
+        )
+        # MlpRegression reports errors but still exits with 0
+        missing = [p for p in outputs if not os.path.exists(p)]
+        if missing:
+            raise RuntimeError(f"{cmd[0]} did not write {', '.join(missing)}")
+        if capture:
+            log.write(result.stdout)
+            return result.stdout
+        return None
+
+def parse_metrics(output):
+    metrics = []
+    for line in output.splitlines():
+        match = METRICS_LINE.match(line.strip())
+        if match:
+            model, mae, rmse = match.groups()
+            metrics.append({"model": model, "MAE": float(mae),
+                            "RMSE": float(rmse)})
+    if not metrics:
+        raise RuntimeError("compare_models.py printed no metrics")
+    return metrics
+
+def main():
+    p = argparse.ArgumentParser(description="Run the lab7 experiment grid")
+    p.add_argument("--neurons", type=int, nargs="+", default=NEURONS)
+    p.add_argument("--eta", type=float, nargs="+", default=ETAS)
+    p.add_argument("--epochs", type=int, nargs="+", default=EPOCHS)
+    p.add_argument("--batch", type=int, default=32)
+    p.add_argument("--jobs", "-j", type=int, default=os.cpu_count(),
+                   help="configurations run at the same time (default: all cores)")
+    p.add_argument("--seed", type=int, default=0,
+                   help="seed of the generated train (seed) and test (seed+1) data")
+    p.add_argument("--root", default=LAB_DIR,
+                   help="lab7 directory the paths are relative to")
+    p.add_argument("--results", default="results.csv",
+                   help="CSV table of all metrics (relative to --root)")
+    p.add_argument("--grid", type=int, default=80,
+                   help="grid size of the surface plots (default 80)")
+    p.add_argument("--no-plot", action="store_true")
+    p.add_argument("--dotnet", default="dotnet",
+                   help="command used to build and run MlpRegression")
+    args = p.parse_args()
+
+    paths = Paths(os.path.abspath(args.root))
+    paths.makedirs()
+    runner = Runner(paths, args.dotnet)
+    runner.generate_data(args.seed)
+
+    configs = [
+        {"neurons": n, "eta": e, "epochs": ep, "batch": args.batch}
+        for n, e, ep in itertools.product(args.neurons, args.eta, args.epochs)
+    ]
+    rows, failed = [], []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(runner.run_config, c): c for c in configs}
+        for future, config in futures.items():
+            run = run_name(config["neurons"], config["eta"], config["epochs"])
+            try:
+                rows.extend(future.result())
+                print(f"[done]   {run}")
+            except Exception as e:
+                failed.append(run)
+                print(f"[failed] {run}: {e} (see {paths.run(run)['log']})")
+
+    if rows:
+        results = pd.DataFrame(rows).sort_values(
+            ["neurons", "eta", "epochs", "model"], ignore_index=True
+        )
+        results_path = os.path.join(paths.root, args.results)
+        results.to_csv(results_path, index=False)
+        print(results.to_string(index=False))
+        print(f"Saved {len(results)} results to '{results_path}'")
+
+    if not args.no_plot:
+        print("Generating surface plots for all runs...")
+        subprocess.run([
+            sys.executable, os.path.join(SCRIPTS_DIR, "plot_surface.py"),
+            "--V-dir", paths.V_dir, "--W-dir", paths.W_dir,
+            "--out-dir", paths.surfaces, "--grid", str(args.grid),
+        ], check=True)
+
+    if failed:
+        print(f"{len(failed)} of {len(configs)} runs failed; re-run to resume")
+        sys.exit(1)
+    print("All experiments completed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the lab8 Naive Bayes estimators against scikit-learn.
+
+For every combination of --rows x --features x --classes x --bins it
+times fit and predict on synthetic Gaussian data and reports rows/sec
+and the peak resident memory of each estimator next to its sklearn
+counterpart:
+- NaiveBayesDiscrete   vs KBinsDiscretizer + CategoricalNB
+- NaiveBayesContinuous vs GaussianNB
+
+Every measurement runs in a fresh process, so the peak RSS of one
+estimator is not hidden by another. Results are written as JSON (one
+record per estimator and configuration, plus environment metadata) so
+that runs of different releases can be diffed.
+
+Usage:
+    python3 benchmark.py [--rows N ...] [--features F ...] [--classes C ...]
+                         [--bins B ...] [--repeat R] [--out results.json]
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+import sklearn
+from sklearn.naive_bayes import CategoricalNB, GaussianNB
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import KBinsDiscretizer
+
+from nb_continuous import NaiveBayesContinuous
+from nb_discrete import NaiveBayesDiscrete
+
+ESTIMATORS = {
+    "NaiveBayesDiscrete": lambda n_bins: NaiveBayesDiscrete(
+        n_bins=n_bins, laplace=True
+    ),
+    "sklearn CategoricalNB": lambda n_bins: make_pipeline(
+        KBinsDiscretizer(n_bins=n_bins, encode="ordinal", strategy="uniform"),
+        CategoricalNB(),
+    ),
+    "NaiveBayesContinuous": lambda n_bins: NaiveBayesContinuous(),
+    "sklearn GaussianNB": lambda n_bins: GaussianNB(),
+}
+# Estimators whose results depend on --bins
+BINNED = {"NaiveBayesDiscrete", "sklearn CategoricalNB"}
+
+def make_data(n_rows, n_features, n_classes, seed=0):
+    """Gaussian blobs with one random centre per class."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=2.0, size=(n_classes, n_features))
+    y = rng.integers(0, n_classes, n_rows)
+    X = rng.normal(size=(n_rows, n_features))
+    X += centers[y]
+    return X, y
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+def measure(name, n_rows, n_features, n_classes, n_bins, repeat):
+    """Time one estimator on one configuration (run in a fresh process)."""
+    X, y = make_data(n_rows, n_features, n_classes)
+    rss_data = peak_rss_mb()
+
+    fit_times, predict_times = [], []
+    for _ in range(repeat):
+        model = ESTIMATORS[name](n_bins)
+        t0 = time.perf_counter()
+        model.fit(X, y)
+        t1 = time.perf_counter()
+        y_pred = model.predict(X)
+        t2 = time.perf_counter()
+        fit_times.append(t1 - t0)
+        predict_times.append(t2 - t1)
+
+    fit_s, predict_s = min(fit_times), min(predict_times)
+    peak = peak_rss_mb()
+    return {
+        "estimator": name,
+        "rows": n_rows,
+        "features": n_features,
+        "classes": n_classes,
+        "bins": n_bins,
+        "fit_s": fit_s,
+        "predict_s": predict_s,
+        "fit_rows_per_s": n_rows / fit_s,
+        "predict_rows_per_s": n_rows / predict_s,
+        "peak_rss_mb": peak,
+        "peak_rss_over_data_mb": peak - rss_data,
+        "train_accuracy": float(np.mean(y_pred == y)),
+    }
+
+def run(rows, features, classes, bins, repeat=3, estimators=None):
+    ctx = multiprocessing.get_context("spawn")
+    records = []
+    configs = [
+        (name, n_rows, n_features, n_classes, n_bins)
+        for n_rows, n_features, n_classes in itertools.product(
+            rows, features, classes
+        )
+        for name in estimators or ESTIMATORS
+        for n_bins in (bins if name in BINNED else [None])
+    ]
+    for name, n_rows, n_features, n_classes, n_bins in configs:
+        with ctx.Pool(1) as pool:
+            record = pool.apply(
+                measure,
+                (name, n_rows, n_features, n_classes, n_bins, repeat),
+            )
+        records.append(record)
+        print(
+            f"{name:22s} rows={n_rows:<9d} features={n_features:<5d} "
+            f"classes={n_classes:<4d} bins={str(n_bins or '-'):<4s} "
+            f"fit={record['fit_rows_per_s']:12.0f} rows/s  "
+            f"predict={record['predict_rows_per_s']:12.0f} rows/s  "
+            f"peak={record['peak_rss_mb']:8.1f} MB",
+            flush=True,
+        )
+    return records
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": multiprocessing.cpu_count(),
+    }
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Benchmark the Naive Bayes estimators against sklearn"
+    )
+    p.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    p.add_argument("--features", type=int, nargs="+", default=[10, 100])
+    p.add_argument("--classes", type=int, nargs="+", default=[3, 20])
+    p.add_argument("--bins", type=int, nargs="+", default=[10])
+    p.add_argument("--repeat", type=int, default=3,
+                   help="Timing repetitions; the fastest is reported")
+    p.add_argument("--estimators", nargs="+", choices=list(ESTIMATORS),
+                   default=None, help="Subset of estimators to run")
+    p.add_argument("--out", default="benchmark_results.json",
+                   help="JSON results file (default benchmark_results.json)")
+    args = p.parse_args()
+
+    records = run(args.rows, args.features, args.classes, args.bins,
+                  repeat=args.repeat, estimators=args.estimators)
+    with open(args.out, "w") as f:
+        json.dump({"environment": environment(), "results": records},
+                  f, indent=2)
+    print(f"Saved {len(records)} results to '{args.out}'")
+
+if __name__ == "__main__":
+    main()
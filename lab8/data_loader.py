@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Rows parsed per chunk
+CHUNK_ROWS = 1 << 18
+# Bumped whenever the cached layout or the parsing rules change
+CACHE_VERSION = 1
+
+def load_table(path, delimiter=",", header=False, label_col=0,
+               dtype=np.float32, cache=True, cache_dir=None):
+    """
+    Load a delimited text file into (X, y, categorical).
+
+    - header=False: UCI-style file without a header row
+    - header=True: first row holds column names; label_col may be a name
+    - label_col: index (or name) of the label column
+    - dtype: float dtype of X
+    - categorical: boolean mask of the feature columns that held text;
+      those are stored as integer codes of the sorted distinct values,
+      the same codes LabelEncoder assigns
+    The codes stay in the float matrix X because the estimators and the
+    Discretizer take one homogeneous array, and one cached .npy can be
+    memory-mapped as a whole. A float holds integers exactly up to
+    2**24 (float32) or 2**53 (float64); a column with more distinct
+    values than that raises ValueError instead of merging codes.
+    Text labels are returned as a str array.
+
+    The file is parsed in chunks of CHUNK_ROWS rows with pandas' C
+    parser. With cache=True the result is also stored as .npy files in a
+    sidecar directory (cache_dir, default .nbcache next to the file)
+    keyed by the file content hash and the options above. Later calls
+    memory-map it instead of parsing. The hash is remembered with the
+    file's size and mtime and only recomputed when either changes, so a
+    cache hit does not read the source file.
+    """
+    dtype = np.dtype(dtype)
+    options = {
+        "version": CACHE_VERSION,
+        "delimiter": delimiter,
+        "header": header,
+        "label_col": label_col,
+        "dtype": dtype.str,
+    }
+    if cache:
+        entry = _cache_entry(path, options, cache_dir)
+        if os.path.isdir(entry):
+            return _read_cache(entry)
+
+    X, y, categorical = _parse(path, delimiter, header, label_col, dtype)
+    if cache:
+        _write_cache(entry, X, y, categorical)
+    return X, y, categorical
+
+def file_hash(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _parse(path, delimiter, header, label_col, dtype):
+    reader = pd.read_csv(
+        path,
+        sep=delimiter,
+        header=0 if header else None,
+        chunksize=CHUNK_ROWS,
+        engine="c",
+        skip_blank_lines=True,
+    )
+
+    X_chunks, y_chunks = [], []
+    levels = {}  # text column -> {value: code in order of appearance}
+    label_name = None
+    for i, chunk in enumerate(reader):
+        if label_name is None:
+            label_name = (chunk.columns[label_col]
+                          if isinstance(label_col, int) else label_col)
+            feature_names = [c for c in chunk.columns if c != label_name]
+        y_chunks.append(chunk[label_name].to_numpy())
+
+        X_chunk = np.empty((len(chunk), len(feature_names)), dtype=dtype)
+        for j, name in enumerate(feature_names):
+            col = chunk[name]
+            if name in levels or not pd.api.types.is_numeric_dtype(col):
+                if i > 0 and name not in levels:
+                    raise ValueError(
+                        f"Column {name!r} is numeric in the first "
+                        f"{i * CHUNK_ROWS} rows but holds text later"
+                    )
+                level_codes = levels.setdefault(name, {})
+                X_chunk[:, j] = _encode(col.astype(str), level_codes)
+            else:
+                X_chunk[:, j] = col.to_numpy(dtype=dtype)
+        X_chunks.append(X_chunk)
+
+    if label_name is None:
+        raise ValueError(f"{path} contains no rows")
+    X = np.concatenate(X_chunks)
+    y = np.concatenate(y_chunks)
+    if y.dtype.hasobject:
+        y = y.astype(str)
+
+    categorical = np.zeros(len(feature_names), dtype=bool)
+    max_levels = 2 ** (np.finfo(dtype).nmant + 1)
+    for name, level_codes in levels.items():
+        if len(level_codes) > max_levels:
+            raise ValueError(
+                f"Column {name!r} has {len(level_codes)} distinct values, "
+                f"more than {dtype} can code exactly; use dtype=np.float64"
+            )
+        j = feature_names.index(name)
+        categorical[j] = True
+        # Renumber the codes by sorted value, like LabelEncoder
+        values = np.array(list(level_codes), dtype=object)
+        rank = np.empty(len(values), dtype=np.intp)
+        rank[np.argsort(values.astype(str))] = np.arange(len(values))
+        X[:, j] = rank[X[:, j].astype(np.intp)]
+    return X, y, categorical
+
+def _encode(col, level_codes):
+    """Codes of col in order of first appearance across all chunks."""
+    codes, uniques = pd.factorize(col)
+    mapping = np.array([
+        level_codes.setdefault(u, len(level_codes)) for u in uniques
+    ])
+    return mapping[codes]
+
+def _cache_entry(path, options, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)),
+                                 ".nbcache")
+    options = json.dumps(options, sort_keys=True)
+    key = hashlib.sha256(
+        (_source_hash(path, options, cache_dir) + options).encode()
+    ).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{key}")
+
+def _source_hash(path, options, cache_dir):
+    """file_hash(path), reused from the last call while size and mtime match."""
+    st = os.stat(path)
+    source = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    name = hashlib.sha256(
+        (os.path.abspath(path) + options).encode()
+    ).hexdigest()[:16]
+    index = os.path.join(cache_dir, f"{os.path.basename(path)}.{name}.json")
+    try:
+        with open(index) as f:
+            record = json.load(f)
+        if {k: record.get(k) for k in source} == source:
+            return record["hash"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    source["hash"] = file_hash(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, "w") as f:
+        json.dump(source, f)
+    os.replace(tmp, index)
+    return source["hash"]
+
+def _read_cache(entry):
+    X = np.load(os.path.join(entry, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(entry, "y.npy"), mmap_mode="r")
+    categorical = np.load(os.path.join(entry, "categorical.npy"))
+    return X, y, categorical
+
+def _write_cache(entry, X, y, categorical):
+    # Write into a temporary directory and rename it, so that concurrent
+    # or interrupted runs never see a half-written entry
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(entry))
+    try:
+        np.save(os.path.join(tmp, "X.npy"), X)
+        np.save(os.path.join(tmp, "y.npy"), y)
+        np.save(os.path.join(tmp, "categorical.npy"), categorical)
+        os.rename(tmp, entry)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(entry):
+            raise
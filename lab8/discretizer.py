@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import scipy.sparse as sp
+
+from nb_base import _check_array
+
+STRATEGIES = ("uniform", "quantile", "fixed")
+
+# Rows per block in the arithmetic binning kernel
+BLOCK_ROWS = 4096
+# Cells per dense block when sketching sparse input
+SPARSE_BLOCK_CELLS = 1 << 20
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch over all columns of a matrix
+    (a KLL-style compactor hierarchy).
+
+    Level h holds samples of weight 2**h, one column per feature. Since
+    every row contributes one value to every column, a level has the same
+    number of rows for all features and is kept as a (rows, n_features)
+    array. When a level grows beyond k rows it is sorted column-wise and
+    every other row is promoted to the next level, so memory stays
+    O(k * log(n / k) * n_features) and quantiles have rank error of
+    roughly O(log(n / k) / k). Below k samples the result is exact.
+    """
+
+    def __init__(self, n_features, k=200):
+        self.n_features = n_features
+        self.k = k
+        self.levels = [np.empty((0, n_features))]
+        self.offsets = [0]
+        self.count = 0
+        self.min_ = np.full(n_features, np.inf)
+        self.max_ = np.full(n_features, -np.inf)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=float)
+        if X.shape[0] == 0:
+            return self
+        self.count += X.shape[0]
+        self.min_ = np.minimum(self.min_, X.min(axis=0))
+        self.max_ = np.maximum(self.max_, X.max(axis=0))
+        self.levels[0] = np.concatenate([self.levels[0], X])
+        self._compact()
+        return self
+
+    def merge(self, other):
+        if other.n_features != self.n_features:
+            raise ValueError("Cannot merge sketches over different features")
+        for h, level in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty((0, self.n_features)))
+                self.offsets.append(0)
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.count += other.count
+        self.min_ = np.minimum(self.min_, other.min_)
+        self.max_ = np.maximum(self.max_, other.max_)
+        self._compact()
+        return self
+
+    def _compact(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if level.shape[0] <= self.k:
+                h += 1
+                continue
+            level = np.sort(level, axis=0)
+            # An odd leftover stays at this level with its original weight
+            n_pairs = level.shape[0] // 2
+            self.levels[h] = level[2 * n_pairs:]
+            # Alternate which element of each pair survives, so that
+            # successive compactions do not bias the ranks in one direction
+            promoted = level[self.offsets[h]:2 * n_pairs:2]
+            self.offsets[h] ^= 1
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty((0, self.n_features)))
+                self.offsets.append(0)
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, qs):
+        """
+        Return an array of shape (len(qs), n_features) with, per column,
+        the smallest retained value whose cumulative weight reaches
+        q * total. q = 0 and q = 1 give the exact minimum and maximum.
+        """
+        qs = np.asarray(qs, dtype=float)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(level.shape[0], 2.0 ** h)
+            for h, level in enumerate(self.levels)
+        ])
+        order = np.argsort(values, axis=0)
+        values = np.take_along_axis(values, order, axis=0)
+        cum = np.cumsum(weights[order], axis=0)
+
+        # First position where the cumulative weight reaches q * total
+        targets = qs[:, None, None] * cum[-1]
+        pos = np.argmax(cum[None] >= targets, axis=1)
+        out = np.take_along_axis(values, pos, axis=0)
+        out[qs <= 0] = self.min_
+        out[qs >= 1] = self.max_
+        return out
+
+class Discretizer:
+    """
+    Per-feature bin edges for NaiveBayesDiscrete.
+
+    strategy:
+    - "uniform": n_bins equal-width bins between the feature min and max
+      (the same edges as np.histogram_bin_edges)
+    - "quantile": n_bins equal-frequency bins from a QuantileSketch, so a
+      few outliers do not squeeze the data into one bin
+    - "fixed": user-supplied bin_edges, either one array for all features
+      or one array per feature
+
+    categorical_features (indices or a boolean mask) are not binned: they
+    hold integer category codes which are used directly. Their number of
+    categories is n_categories (an int, or one per categorical feature)
+    or else one more than the largest code seen while fitting; any other
+    value (negative, too large, NaN) gets the extra "unknown" code
+    n_categories.
+
+    Edges can be learned in one pass over chunked input with partial_fit,
+    and statistics gathered by separate workers can be combined with
+    merge. Values are coded like np.digitize(x, edges, right=False), i.e.
+    in 0..len(edges), using the smallest unsigned dtype that fits
+    (codes_dtype_). n_codes_ holds the number of codes of every feature.
+
+    transform picks a kernel per feature: equally spaced edges are
+    binned arithmetically for all such features in one vectorized
+    expression, anything else with a per-feature binary search.
+    transform_sparse codes the stored values of a CSR matrix without
+    densifying it.
+    """
+
+    def __init__(self, n_bins=5, strategy="uniform", bin_edges=None,
+                 sketch_size=200, categorical_features=None,
+                 n_categories=None):
+        self.n_bins = n_bins
+        self.strategy = strategy
+        self.bin_edges = bin_edges
+        self.sketch_size = sketch_size
+        self.categorical_features = categorical_features
+        self.n_categories = n_categories
+
+    @classmethod
+    def from_edges(cls, bin_edges, n_categories=None):
+        """
+        A frozen Discretizer over the given per-feature edges; features
+        whose edges are None are categorical with n_categories[j] codes.
+        """
+        categorical = np.array([e is None for e in bin_edges], dtype=bool)
+        discretizer = cls(
+            strategy="fixed",
+            bin_edges=bin_edges,
+            categorical_features=categorical,
+            n_categories=(None if n_categories is None
+                          else np.asarray(n_categories)[categorical]),
+        )
+        discretizer._init_state(len(bin_edges))
+        return discretizer
+
+    def fit(self, X):
+        for attr in ("n_features_", "min_", "max_", "sketch_", "cat_max_"):
+            self.__dict__.pop(attr, None)
+        return self.partial_fit(X)
+
+    def partial_fit(self, X):
+        X = _check_array(X)
+        if not hasattr(self, "n_features_"):
+            self._init_state(X.shape[1])
+        if X.shape[1] != self.n_features_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, expected {self.n_features_}"
+            )
+        if X.shape[0] > 0:
+            if self.strategy == "uniform":
+                lo, hi = _column_min_max(X)
+                self.min_ = np.minimum(self.min_, lo)
+                self.max_ = np.maximum(self.max_, hi)
+            elif self.strategy == "quantile":
+                _update_sketch(self.sketch_, X)
+            if self.n_categories is None:
+                self.cat_max_ = np.fmax(self.cat_max_,
+                                        _category_max(X, self.categorical_))
+        self._update_edges()
+        return self
+
+    def merge(self, other):
+        """Fold in the statistics of another Discretizer with equal params."""
+        if (other.strategy, other.n_bins) != (self.strategy, self.n_bins):
+            raise ValueError("Cannot merge discretizers with different params")
+        if not hasattr(other, "n_features_"):
+            return self
+        if not hasattr(self, "n_features_"):
+            self._init_state(other.n_features_)
+        if self.strategy == "uniform":
+            self.min_ = np.minimum(self.min_, other.min_)
+            self.max_ = np.maximum(self.max_, other.max_)
+        elif self.strategy == "quantile":
+            self.sketch_.merge(other.sketch_)
+        if self.n_categories is None:
+            self.cat_max_ = np.fmax(self.cat_max_, other.cat_max_)
+        self._update_edges()
+        return self
+
+    def transform(self, X, out=None):
+        X = np.asarray(X)
+        n_samples, n_features = X.shape
+        if n_features != self.n_features_:
+            raise ValueError(
+                f"X has {n_features} features, expected {self.n_features_}"
+            )
+        if out is None:
+            out = np.empty((n_samples, n_features), dtype=self.codes_dtype_)
+
+        if len(self._uniform_features):
+            self._uniform_codes(X, out)
+        for j in self._search_features:
+            # side="right" matches np.digitize(..., right=False)
+            out[:, j] = np.searchsorted(self.bin_edges_[j], X[:, j],
+                                        side="right")
+        idx = self._categorical_features
+        if len(idx):
+            out[:, idx] = _category_codes(X[:, idx], self.n_categories_[idx])
+        return out
+
+    def transform_sparse(self, X):
+        """
+        Code a CSR matrix without densifying it. Returns (zero_codes,
+        data_codes): the code of an implicit zero of every feature and the
+        codes of the stored values X.data.
+        """
+        zero_codes = self.transform(np.zeros((1, self.n_features_)))[0]
+        return zero_codes, self._element_codes(X.data, X.indices)
+
+    def _element_codes(self, values, cols):
+        """Codes of values, where values[i] belongs to feature cols[i]."""
+        out = np.empty(len(values), dtype=self.codes_dtype_)
+        kind = self._kind[cols]
+
+        sel = kind == UNIFORM
+        if sel.any():
+            pos = self._uniform_pos[cols[sel]]
+            out[sel] = self._arith_codes(values[sel], pos)
+
+        sel = kind == CATEGORICAL
+        if sel.any():
+            out[sel] = _category_codes(values[sel],
+                                       self.n_categories_[cols[sel]])
+
+        sel = np.flatnonzero(kind == SEARCH)
+        if len(sel):
+            # Group the values by feature and search each group's edges
+            sel = sel[np.argsort(cols[sel], kind="stable")]
+            starts = np.flatnonzero(np.diff(cols[sel])) + 1
+            for group in np.split(sel, starts):
+                edges = self.bin_edges_[cols[group[0]]]
+                out[group] = np.searchsorted(edges, values[group],
+                                             side="right")
+        return out
+
+    def _uniform_codes(self, X, out):
+        """
+        Write the codes of the equally spaced features into out, one block
+        of rows at a time so that all temporaries stay cache-sized.
+        """
+        idx = self._uniform_features
+        pos = np.arange(len(idx))
+        block = max(1, min(BLOCK_ROWS, X.shape[0]))
+        guess = np.empty((block, len(idx)))
+        codes = np.empty((block, len(idx)), dtype=np.intp)
+
+        for start in range(0, X.shape[0], block):
+            x = X[start:start + block, idx]
+            out[start:start + len(x), idx] = self._arith_codes(
+                x, pos, guess[:len(x)], codes[:len(x)]
+            )
+
+    def _arith_codes(self, x, pos, guess=None, codes=None):
+        """
+        Codes of x for the equally spaced features number pos (indices
+        into the uniform group, broadcast against x).
+        """
+        width = self._padded_edges.shape[1]
+        flat_edges = self._padded_edges.ravel()
+        offsets = pos * width
+        n_edges = self._n_edges[pos]
+        g = np.empty(x.shape) if guess is None else guess
+        c = np.empty(x.shape, dtype=np.intp) if codes is None else codes
+
+        # Arithmetic guess of the bin of every value...
+        np.subtract(x, self._lo[pos], out=g)
+        g *= self._inv_width[pos]
+        np.floor(g, out=g)
+        g += 1
+        g[np.isnan(g)] = np.inf  # NaN goes to the last bin
+        np.clip(g, 0, n_edges, out=g)
+        np.copyto(c, g, casting="unsafe")
+        c += offsets
+
+        # ...then fix the rare off-by-one caused by rounding, so the
+        # codes are exactly those of np.digitize on the stored edges
+        while True:
+            below = x < np.take(flat_edges, c)
+            above = x >= np.take(flat_edges, c + 1)
+            above &= c < offsets + n_edges  # +inf stays in the last bin
+            if not (below.any() or above.any()):
+                break
+            c -= below
+            c += above
+
+        c -= offsets
+        return c
+
+    def _prepare_kernels(self):
+        categorical = self.categorical_
+        self.n_codes_ = np.array([
+            n_cat + 1 if e is None else len(e) + 1
+            for e, n_cat in zip(self.bin_edges_, self.n_categories_)
+        ])
+        max_code = self.n_codes_.max() - 1
+        self.codes_dtype_ = (
+            np.uint8 if max_code <= np.iinfo(np.uint8).max
+            else np.uint16 if max_code <= np.iinfo(np.uint16).max
+            else np.uint32
+        )
+
+        uniform = np.array([
+            e is not None and _equally_spaced(e) for e in self.bin_edges_
+        ], dtype=bool)
+        self._kind = np.where(categorical, CATEGORICAL,
+                              np.where(uniform, UNIFORM, SEARCH))
+        self._uniform_features = np.flatnonzero(self._kind == UNIFORM)
+        self._search_features = np.flatnonzero(self._kind == SEARCH)
+        self._categorical_features = np.flatnonzero(categorical)
+        self._uniform_pos = np.cumsum(uniform) - 1
+
+        edges = [self.bin_edges_[j] for j in self._uniform_features]
+        self._n_edges = np.array([len(e) for e in edges], dtype=np.intp)
+        self._lo = np.array([e[0] for e in edges])
+        self._inv_width = np.array([(len(e) - 1) / (e[-1] - e[0])
+                                    for e in edges])
+        # Row j holds [-inf, edges_j..., +inf, ...], so that code c is
+        # correct iff padded[j, c] <= x < padded[j, c + 1]
+        width = max(self._n_edges, default=0) + 2
+        self._padded_edges = np.full((len(edges), width), np.inf)
+        self._padded_edges[:, 0] = -np.inf
+        for row, e in zip(self._padded_edges, edges):
+            row[1:len(e) + 1] = e
+
+    def _init_state(self, n_features):
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {self.strategy!r}")
+        self.n_features_ = n_features
+        self.categorical_ = _feature_mask(self.categorical_features,
+                                          n_features)
+        self.n_categories_ = np.zeros(n_features, dtype=np.intp)
+        if self.n_categories is None:
+            self.cat_max_ = np.full(self.categorical_.sum(), -1.0)
+        else:
+            self.n_categories_[self.categorical_] = self.n_categories
+
+        if self.strategy == "uniform":
+            self.min_ = np.full(n_features, np.inf)
+            self.max_ = np.full(n_features, -np.inf)
+        elif self.strategy == "quantile":
+            self.sketch_ = QuantileSketch(n_features, k=self.sketch_size)
+        else:
+            self.bin_edges_ = self._check_fixed_edges(n_features)
+            if self.n_categories is not None or not self.categorical_.any():
+                self._prepare_kernels()
+
+    def _update_edges(self):
+        binned = ~self.categorical_
+        if self.n_categories is None:
+            # Codes 0..max seen; NaN (nothing seen yet) means no categories
+            n_cat = np.nan_to_num(self.cat_max_, nan=-1.0) + 1
+            self.n_categories_[self.categorical_] = np.maximum(n_cat, 0)
+
+        if self.strategy == "uniform":
+            lo = self.min_[binned].astype(float)
+            hi = self.max_[binned].astype(float)
+            if not (np.all(np.isfinite(lo)) and np.all(np.isfinite(hi))):
+                raise ValueError("Feature range is empty or not finite")
+            # Constant features get a unit-width range, as in np.histogram
+            same = lo == hi
+            lo[same] -= 0.5
+            hi[same] += 0.5
+            edges = iter(np.linspace(lo, hi, self.n_bins + 1).T)
+            self.bin_edges_ = [next(edges) if b else None for b in binned]
+        elif self.strategy == "quantile":
+            if self.sketch_.count == 0:
+                raise ValueError("Feature range is empty or not finite")
+            qs = np.linspace(0, 1, self.n_bins + 1)
+            edges = self.sketch_.quantiles(qs)
+            # Repeated quantiles (heavy ties) collapse into one edge
+            self.bin_edges_ = [
+                np.unique(col) if b else None
+                for col, b in zip(edges.T, binned)
+            ]
+        self._prepare_kernels()
+
+    def _check_fixed_edges(self, n_features):
+        if self.bin_edges is None:
+            raise ValueError('strategy="fixed" requires bin_edges')
+        edges = self.bin_edges
+        if np.ndim(edges[0]) == 0 and edges[0] is not None:
+            edges = [edges] * n_features
+        if len(edges) != n_features:
+            raise ValueError(
+                f"Got bin_edges for {len(edges)} features, expected {n_features}"
+            )
+        edges = [
+            None if is_cat else np.asarray(e, dtype=float)
+            for e, is_cat in zip(edges, self.categorical_)
+        ]
+        for e in edges:
+            if e is None:
+                continue
+            if e.ndim != 1 or len(e) == 0 or np.any(np.diff(e) < 0):
+                raise ValueError("bin_edges must be non-empty increasing arrays")
+        return edges
+
+# Kernel used for a feature
+UNIFORM, SEARCH, CATEGORICAL = 0, 1, 2
+
+def _feature_mask(features, n_features):
+    """Boolean mask from None, a boolean mask or feature indices."""
+    mask = np.zeros(n_features, dtype=bool)
+    if features is None:
+        return mask
+    features = np.asarray(features)
+    if features.dtype == bool:
+        if len(features) != n_features:
+            raise ValueError(
+                f"Got a mask of {len(features)} features, expected {n_features}"
+            )
+        return features.copy()
+    mask[features] = True
+    return mask
+
+def _column_min_max(X):
+    if sp.issparse(X):
+        # Includes the implicit zeros of columns that are not full
+        return (X.min(axis=0).toarray().ravel(),
+                X.max(axis=0).toarray().ravel())
+    return X.min(axis=0), X.max(axis=0)
+
+def _category_max(X, mask):
+    cols = X[:, mask]
+    if sp.issparse(cols):
+        return cols.max(axis=0).toarray().ravel()
+    return np.fmax.reduce(cols, axis=0)  # ignores NaN
+
+def _update_sketch(sketch, X):
+    if not sp.issparse(X):
+        sketch.update(X)
+        return
+    # Densify a bounded number of cells at a time
+    block = max(1, SPARSE_BLOCK_CELLS // max(1, X.shape[1]))
+    for start in range(0, X.shape[0], block):
+        sketch.update(X[start:start + block].toarray())
+
+def _category_codes(values, n_categories):
+    """Integer codes of values; anything not in [0, n_categories) is unknown."""
+    valid = (values >= 0) & (values < n_categories)
+    return np.where(valid, values, n_categories)
+
+def _equally_spaced(edges):
+    """True if edges has at least two strictly increasing, evenly spaced values."""
+    if len(edges) < 2 or not np.all(np.isfinite(edges)):
+        return False
+    steps = np.diff(edges)
+    return steps[0] > 0 and np.allclose(steps, steps[0], rtol=1e-9, atol=0)
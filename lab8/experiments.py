@@ -1,43 +1,36 @@
 #!/usr/bin/env python3
 
 import numpy as np
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, log_loss
-from sklearn.preprocessing import LabelEncoder
 
+from data_loader import load_table
 from nb_discrete import NaiveBayesDiscrete
 from nb_continuous import NaiveBayesContinuous
 from sklearn.naive_bayes import CategoricalNB, GaussianNB
+from sweep import fit_bin_sweep, run_sweep, summarize
 import argparse
+import os
 
-def load_data(path: str, delimiter=",", csv=False, label_col=0):
+def load_data(path: str, delimiter=",", csv=False, label_col=0,
+              dtype=np.float64, cache=True):
     """
-    Load a dataset from .data or .csv.
+    Load a dataset from .data or .csv (see data_loader.load_table).
     - csv=False: legacy UCI-style loader (first col = label, no header)
-    - csv=True: pandas reader with header support; label_col can be int index or str name
+    - csv=True: header support; label_col can be int index or str name,
+      text feature columns are label-encoded
+    Returns (X, y, categorical), where categorical lists the indices of
+    the text feature columns.
     """
-    if csv:
-        df = pd.read_csv(path, delimiter=delimiter)
-        # If label_col is numeric index, convert to column name
-        if isinstance(label_col, int):
-            label_name = df.columns[label_col]
-        else:
-            label_name = label_col
-
-        y = df[label_name].values
-        X_df = df.drop(labels=[label_name], axis=1)
-
-        # Encode any non-numeric columns
-        for col in X_df.select_dtypes(include=['object', 'category']).columns:
-            X_df[col] = LabelEncoder().fit_transform(X_df[col].astype(str))
-
-        return X_df.values, y
-    else:
-        data = np.genfromtxt(path, delimiter=delimiter)
-        if data.ndim == 1:
-            data = data[np.newaxis, :]
-        return data[:, 1:], data[:, 0]
+    X, y, categorical = load_table(
+        path,
+        delimiter=delimiter,
+        header=csv,
+        label_col=label_col if csv else 0,
+        dtype=dtype,
+        cache=cache,
+    )
+    return X, y, np.flatnonzero(categorical)
 
 def explore_data(X, y):
     print("=== Data exploration ===")
@@ -57,21 +50,27 @@ def explore_data(X, y):
     print("Missing values per feature:", np.sum(np.isnan(X), axis=0))
     print()
 
-def run_discrete_nb(X_train, X_test, y_train, y_test, n_bins=10):
+def run_discrete_nb(X_train, X_test, y_train, y_test, n_bins=10,
+                    categorical_features=None):
     print("=== Discrete Naive Bayes (no Laplace vs. Laplace) ===")
     for laplace in (False, True):
         print(f"Parameters: n_bins={n_bins}, laplace={laplace}")
         # --- custom implementation ---
-        nbd = NaiveBayesDiscrete(n_bins=n_bins, laplace=laplace)
+        nbd = NaiveBayesDiscrete(n_bins=n_bins, laplace=laplace,
+                                 categorical_features=categorical_features)
         nbd.fit(X_train, y_train)
         y_pred = nbd.predict(X_test)
         acc_custom = accuracy_score(y_test, y_pred)
         print(f"Custom NaiveBayesDiscrete accuracy: {acc_custom:.4f}")
 
         # --- sklearn’s CategoricalNB on the same discretization ---
-        Xb_train = nbd._discretize(X_train)
-        Xb_test  = nbd._discretize(X_test)
-        sk_nbd = CategoricalNB()
+        Xb_train = nbd.discretize(X_train)
+        Xb_test  = nbd.discretize(X_test)
+        # Unseen category codes of the test split must be known upfront
+        sk_nbd = CategoricalNB(
+            min_categories=None if categorical_features is None
+            else nbd.n_codes_
+        )
         sk_nbd.fit(Xb_train, y_train)
         y_pred_sk = sk_nbd.predict(Xb_test)
         acc_sklearn = accuracy_score(y_test, y_pred_sk)
@@ -108,14 +107,33 @@ def run_continuous_nb(X_train, X_test, y_train, y_test):
     print(f"sklearn GaussianNB accuracy:          {acc_sklearn:.4f}")
     print()
 
-def bin_sensitivity(X_train, X_test, y_train, y_test, bins_list):
+def bin_sensitivity(X_train, X_test, y_train, y_test, bins_list,
+                    categorical_features=None):
     print("=== Bin count sensitivity ===")
+    # Nested bin counts are derived from one fine-grained fit
+    models = fit_bin_sweep(X_train, y_train, bins_list, laplace=True,
+                           categorical_features=categorical_features)
     for b in bins_list:
-        nbd = NaiveBayesDiscrete(n_bins=b, laplace=True).fit(X_train, y_train)
+        nbd = models[b]
         acc = accuracy_score(y_test, nbd.predict(X_test))
         print(f"n_bins = {b:2d} -> accuracy = {acc:.4f}")
     print()
 
+def cv_sweep(X, y, name, bins_list, n_splits, n_jobs=None, results_path=None,
+             categorical_features=None):
+    print(f"=== {n_splits}-fold CV sweep (n_bins x laplace) ===")
+    results = run_sweep(
+        {name: (X, y, categorical_features)},
+        bins_list,
+        n_splits=n_splits,
+        n_jobs=n_jobs,
+    )
+    print(summarize(results).to_string(index=False))
+    if results_path:
+        results.to_csv(results_path, index=False)
+        print(f"Per-fold results saved to '{results_path}'")
+    print()
+
 def main():
     p = argparse.ArgumentParser(
         description="Run Naive Bayes experiments on a UCI-style .data file"
@@ -141,18 +159,42 @@ def main():
         "--bins", "-b", type=int, nargs="+", default=[2,5,10,20],
         help="List of bin counts for sensitivity (default 2 5 10 20)"
     )
+    p.add_argument(
+        "--dtype", choices=["float32", "float64"], default="float64",
+        help="Feature dtype; float32 halves memory (default float64)"
+    )
+    p.add_argument(
+        "--no-cache", action="store_true",
+        help="Do not read or write the parsed-data cache (.nbcache)"
+    )
+    p.add_argument(
+        "--cv", type=int, default=0,
+        help="Also run a k-fold CV sweep over --bins x laplace (default off)"
+    )
+    p.add_argument(
+        "--jobs", "-j", type=int, default=None,
+        help="Worker processes for the CV sweep (default: all cores)"
+    )
+    p.add_argument(
+        "--results", "-r", default=None,
+        help="CSV file for the per-fold CV sweep results"
+    )
     args = p.parse_args()
 
     # Parse label_col: if digit, cast to int; else leave as string
     lc = int(args.label_col) if args.csv and args.label_col.isdigit() else args.label_col
 
-    X, y = load_data(
+    X, y, categorical = load_data(
         args.data_path,
         delimiter=args.delimiter,
         csv=args.csv,
-        label_col=lc
+        label_col=lc,
+        dtype=args.dtype,
+        cache=not args.no_cache,
     )
     explore_data(X, y)
+    # Text columns are category codes, counted without binning
+    categorical = categorical if len(categorical) else None
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y,
@@ -172,12 +214,24 @@ def main():
     run_discrete_nb(
         X_train, X_test, y_train, y_test,
         n_bins=max(args.bins),
+        categorical_features=categorical,
     )
     run_continuous_nb(X_train, X_test, y_train, y_test)
     bin_sensitivity(
         X_train, X_test, y_train, y_test,
         bins_list=args.bins,
+        categorical_features=categorical,
     )
+    if args.cv:
+        cv_sweep(
+            X, y,
+            name=os.path.basename(args.data_path),
+            bins_list=args.bins,
+            n_splits=args.cv,
+            n_jobs=args.jobs,
+            results_path=args.results,
+            categorical_features=categorical,
+        )
 
 if __name__ == "__main__":
     main()
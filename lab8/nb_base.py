@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, ClassifierMixin
+from threadpoolctl import threadpool_limits
+
+from nb_io import load_arrays, save_arrays
+
+# Rows scored per block by the chunked prediction API
+DEFAULT_CHUNK_SIZE = 65536
+# Rows per scoring task. Blocks are scored independently and always
+# split the same way, so the result does not depend on n_jobs.
+SCORE_BLOCK_ROWS = 4096
+
+# The BLAS thread limit is process-wide: scoring calls running at the
+# same time share one limit, set by the first and restored by the last
+_BLAS_LOCK = threading.Lock()
+_BLAS_USERS = 0
+_BLAS_LIMITER = None
+
+class NaiveBayesBase(BaseEstimator, ClassifierMixin):
+    """
+    Fitting and scoring helpers shared by the Naive Bayes estimators.
+    Subclasses implement:
+    - _init_state(X, classes): reset the sufficient statistics
+    - _accumulate(X, y_idx): add a chunk to the sufficient statistics
+    - _update_model(): derive the scoring parameters from the statistics
+    - _joint_log_likelihood(X, out=None)
+    - _state_arrays(dtype) / _set_state(arrays): fitted state for save/load
+    Sparse X is passed on as CSR; subclasses that cannot use it raise
+    TypeError.
+
+    Scoring goes through _score, which splits X into blocks of
+    SCORE_BLOCK_ROWS rows and scores n_jobs blocks at a time in a thread
+    pool (the NumPy kernels release the GIL). Subclasses take n_jobs as
+    a constructor parameter: None or 1 for one thread, -1 for all cores.
+    """
+
+    def fit(self, X, y):
+        X = _check_array(X)
+        y = np.asarray(y)
+        self._init_state(X, np.unique(y))
+        self._accumulate(X, self._encode_labels(y))
+        self._update_model()
+        return self
+
+    def partial_fit(self, X, y, classes=None):
+        """
+        Incrementally fit on one chunk of samples. classes (all labels
+        that may ever appear) is required on the first call; the model
+        is initialised from that first chunk.
+        """
+        X = _check_array(X)
+        y = np.asarray(y)
+        if not hasattr(self, "class_count_"):
+            if classes is None:
+                raise ValueError(
+                    "classes must be passed on the first call to partial_fit"
+                )
+            self._init_state(X, np.unique(classes))
+        elif not self.class_count_.flags.writeable:
+            raise ValueError(
+                "The model was loaded with mmap=True and is read-only; "
+                "load it with mmap=False to continue training"
+            )
+        elif (classes is not None
+              and not np.array_equal(np.unique(classes), self.classes_)):
+            raise ValueError(
+                "classes differ from those passed on the first partial_fit call"
+            )
+        self._accumulate(X, self._encode_labels(y))
+        self._update_model()
+        return self
+
+    def _encode_labels(self, y):
+        """Map labels to indices into classes_."""
+        idx = np.searchsorted(self.classes_, y)
+        idx[idx == len(self.classes_)] = 0
+        if not np.array_equal(self.classes_[idx], y):
+            raise ValueError("y contains labels that are not in classes_")
+        return idx
+
+    def predict(self, X):
+        # The argmax of the joint log-likelihood, no normalization needed
+        jll = self._score(X)
+        return self.classes_[np.argmax(jll, axis=1)]
+
+    def predict_log_proba(self, X):
+        """
+        Return the joint log‐likelihoods log P(c) + sum_j log P(x_j|c)
+        (i.e. before any softmax normalization).
+        """
+        return self._score(X)
+
+    def predict_topk(self, X, k=3, return_scores=False):
+        """
+        The k most likely classes per sample, best first, as an array of
+        shape (n_samples, k). With return_scores=True also return their
+        joint log-likelihoods. Uses argpartition, so only the top k are
+        sorted. k larger than the number of classes returns all classes.
+        """
+        if not (isinstance(k, (int, np.integer)) and k >= 1):
+            raise ValueError(f"k must be a positive integer, got {k!r}")
+        jll = self._score(X)
+        n_classes = jll.shape[1]
+        k = min(k, n_classes)
+        if k < n_classes:
+            idx = np.argpartition(jll, n_classes - k, axis=1)[:, n_classes - k:]
+        else:
+            idx = np.broadcast_to(np.arange(n_classes), jll.shape)
+        scores = np.take_along_axis(jll, idx, axis=1)
+        order = np.argsort(-scores, axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        if return_scores:
+            return self.classes_[idx], np.take_along_axis(scores, order, axis=1)
+        return self.classes_[idx]
+
+    def save(self, path, dtype=np.float64):
+        """
+        Save the fitted model as a memory-mappable file (see nb_io).
+        The scoring tables are stored as dtype; np.float32 halves them.
+        """
+        meta = {"model": type(self).__name__, "params": self.get_params()}
+        save_arrays(path, self._state_arrays(np.dtype(dtype)), meta)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a model written by save. With mmap=True the arrays are
+        read-only views of the file shared through the page cache and
+        partial_fit raises ValueError; use mmap=False to keep training
+        the model.
+        """
+        arrays, meta = load_arrays(path, mmap=mmap)
+        if meta["model"] != cls.__name__:
+            raise ValueError(f"{path} holds a {meta['model']}, not a {cls.__name__}")
+        model = cls(**meta["params"])
+        model._set_state(arrays)
+        return model
+
+    def _score(self, X, out=None, pool=None):
+        """
+        Joint log-likelihood of X, scored block by block (see n_jobs) on
+        pool, or on a pool of its own if none is passed.
+        """
+        X = _check_array(X)
+        n_samples = X.shape[0]
+        if out is None:
+            out = np.empty((n_samples, len(self.classes_)))
+
+        def score_block(start):
+            stop = start + SCORE_BLOCK_ROWS
+            self._joint_log_likelihood(X[start:stop], out=out[start:stop])
+
+        starts = range(0, n_samples, SCORE_BLOCK_ROWS)
+        if pool is not None:
+            # list() re-raises the first error of any block
+            list(pool.map(score_block, starts))
+        elif len(starts) > 1 and self._n_threads() > 1:
+            with self._scoring_pool(len(starts)) as pool:
+                list(pool.map(score_block, starts))
+        else:
+            for start in starts:
+                score_block(start)
+        return out
+
+    @contextmanager
+    def _scoring_pool(self, n_blocks=None):
+        """
+        Thread pool of n_jobs workers for _score, None for one thread.
+        BLAS is limited to one thread while it is open, the pool
+        provides the parallelism.
+        """
+        n_threads = self._n_threads()
+        if n_blocks is not None:
+            n_threads = min(n_threads, n_blocks)
+        if n_threads <= 1:
+            yield None
+            return
+        with _single_threaded_blas(), \
+             ThreadPoolExecutor(max_workers=n_threads) as pool:
+            yield pool
+
+    def _n_threads(self):
+        n_jobs = getattr(self, "n_jobs", None)
+        if n_jobs is None:
+            return 1
+        if n_jobs < 0:
+            return max(1, os.cpu_count() + 1 + n_jobs)
+        return n_jobs
+
+    def _saved_classes(self):
+        # Labels read through pandas are object arrays; store them as text
+        if self.classes_.dtype.hasobject:
+            return self.classes_.astype(str)
+        return self.classes_
+
+    def iter_predict(self, X, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yield predicted labels for consecutive blocks of chunk_size rows.
+        X only has to support row slicing (ndarray, np.memmap, CSR), so
+        peak memory depends on chunk_size and not on len(X).
+        """
+        for _, idx in self._iter_chunks(X, chunk_size):
+            yield self.classes_[idx]
+
+    def predict_chunked(self, X, chunk_size=DEFAULT_CHUNK_SIZE, out=None):
+        """
+        Same as predict, but scores X in blocks of chunk_size rows through
+        preallocated buffers. out, if given, receives the labels.
+        """
+        if not hasattr(X, "shape"):
+            X = np.asarray(X)
+        n_samples = X.shape[0]
+        if out is None:
+            out = np.empty(n_samples, dtype=self.classes_.dtype)
+        for start, idx in self._iter_chunks(X, chunk_size):
+            np.take(self.classes_, idx, out=out[start:start + len(idx)])
+        return out
+
+    def _iter_chunks(self, X, chunk_size):
+        """
+        Yield (start, class index) for each block; the joint log-likelihood
+        and argmax buffers and the scoring pool are created once and
+        reused for every block.
+        """
+        if not hasattr(X, "shape"):
+            X = np.asarray(X)
+        elif sp.issparse(X):
+            X = X.tocsr()
+        n_samples = X.shape[0]
+        chunk_size = max(1, min(chunk_size, n_samples))
+        jll = np.empty((chunk_size, len(self.classes_)))
+        idx = np.empty(chunk_size, dtype=np.intp)
+
+        n_blocks = -(-chunk_size // SCORE_BLOCK_ROWS)
+        with self._scoring_pool(n_blocks) as pool:
+            for start in range(0, n_samples, chunk_size):
+                X_chunk = _check_array(X[start:start + chunk_size])
+                m = X_chunk.shape[0]
+                self._score(X_chunk, out=jll[:m], pool=pool)
+                np.argmax(jll[:m], axis=1, out=idx[:m])
+                yield start, idx[:m]
+
+@contextmanager
+def _single_threaded_blas():
+    global _BLAS_USERS, _BLAS_LIMITER
+    with _BLAS_LOCK:
+        if _BLAS_USERS == 0:
+            _BLAS_LIMITER = threadpool_limits(limits=1, user_api="blas")
+        _BLAS_USERS += 1
+    try:
+        yield
+    finally:
+        with _BLAS_LOCK:
+            _BLAS_USERS -= 1
+            if _BLAS_USERS == 0:
+                _BLAS_LIMITER.restore_original_limits()
+                _BLAS_LIMITER = None
+
+def _check_array(X):
+    return X.tocsr() if sp.issparse(X) else np.asarray(X)
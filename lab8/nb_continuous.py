@@ -1,38 +1,143 @@
 #!/usr/bin/env python3
 
 import numpy as np
-from sklearn.base import BaseEstimator, ClassifierMixin
+import scipy.sparse as sp
 
-class NaiveBayesContinuous(BaseEstimator, ClassifierMixin):
-    def __init__(self):
-        pass
+from nb_base import NaiveBayesBase
 
-    def fit(self, X, y):
-        X = np.asarray(X)
-        y = np.asarray(y)
-        self.classes_, counts = np.unique(y, return_counts=True)
-        n_samples, n_features = X.shape
+class NaiveBayesContinuous(NaiveBayesBase):
+    """
+    Gaussian Naive Bayes.
+
+    engine selects how the joint log-likelihood is computed:
+    - "quadratic": the Gaussian log-density expanded to
+      X**2 @ A + X @ B + c with A, B, c precomputed in fit, so all classes
+      are scored with two matrix products
+    - "reference": the direct per-class formula, kept for testing
+    The expansion is taken around shift_, the pooled training mean of
+    each feature, so that large feature offsets (|mean| >> std) do not
+    cancel out in X**2 @ A + X @ B.
+
+    n_jobs threads score large batches, see NaiveBayesBase.
+    """
+
+    def __init__(self, engine="quadratic", n_jobs=None):
+        self.engine = engine
+        self.n_jobs = n_jobs
+
+    def _init_state(self, X, classes):
+        _check_dense(X)
+        n_features = X.shape[1]
+        self.classes_ = classes
+        self.class_count_ = np.zeros(len(classes), dtype=np.int64)
+        # Running per-class mean and (population) variance of each feature
+        self.theta_ = np.zeros((len(classes), n_features))
+        self.var_ = np.zeros((len(classes), n_features))
+
+    def _accumulate(self, X, y_idx):
+        _check_dense(X)
+        for idx in np.unique(y_idx):
+            X_c = X[y_idx == idx]
+            n_new = X_c.shape[0]
+            mu_new = X_c.mean(axis=0)
+            var_new = X_c.var(axis=0)
 
-        self.priors_ = counts / n_samples
+            n_old = self.class_count_[idx]
+            if n_old == 0:
+                self.theta_[idx] = mu_new
+                self.var_[idx] = var_new
+            else:
+                # Chan et al. pairwise update of mean and variance
+                n_total = n_old + n_new
+                delta = mu_new - self.theta_[idx]
+                self.theta_[idx] += delta * n_new / n_total
+                self.var_[idx] = (
+                    n_old * self.var_[idx] + n_new * var_new
+                    + delta ** 2 * n_old * n_new / n_total
+                ) / n_total
+            self.class_count_[idx] += n_new
 
-        # Compute per-class mean and variance for each feature
+    def _update_model(self):
+        with np.errstate(divide="ignore"):
+            self.priors_ = self.class_count_ / self.class_count_.sum()
+            log_priors = np.log(self.priors_)
+
+        self._set_params_dict()
+
+        # Closed-form coefficients of
+        # log P(c) - 0.5 * sum_j (log(2*pi*var) + (x_j - mu)**2 / var)
+        # in the shifted x_j - shift_j, mu - shift_j
+        mu = np.array([self.params_[c][0] for c in self.classes_])
+        var = np.array([self.params_[c][1] for c in self.classes_])
+        n_total = self.class_count_.sum()
+        if n_total > 0:
+            self.shift_ = self.class_count_ @ self.theta_ / n_total
+        else:
+            self.shift_ = np.zeros(self.theta_.shape[1])
+        mu = mu - self.shift_
+        # (n_features, n_classes), C-contiguous for the matrix products
+        self.quad_coef_ = np.ascontiguousarray((-0.5 / var).T)
+        self.lin_coef_ = np.ascontiguousarray((mu / var).T)
+        self.intercept_ = log_priors - 0.5 * (
+            np.log(2 * np.pi * var) + mu ** 2 / var
+        ).sum(axis=1)
+
+    def _set_params_dict(self):
+        # Per-class mean and variance for each feature
         # Store as dict: class -> (mean_vector, var_vector)
         self.params_ = {}
         for idx, c in enumerate(self.classes_):
-            X_c = X[y == c]
-            mu = X_c.mean(axis=0)
-            var = X_c.var(axis=0)
+            mu = self.theta_[idx].copy()
+            var = self.var_[idx].copy()
             # Avoid zero variance
             var[var == 0] = 1e-9
             self.params_[c] = (mu, var)
 
-        return self
+    def _state_arrays(self, dtype):
+        return {
+            "classes": self._saved_classes(),
+            "class_count": self.class_count_,
+            "theta": self.theta_,
+            "var": self.var_,
+            "priors": self.priors_,
+            "shift": self.shift_,
+            "quad_coef": self.quad_coef_.astype(dtype),
+            "lin_coef": self.lin_coef_.astype(dtype),
+            "intercept": self.intercept_.astype(dtype),
+        }
+
+    def _set_state(self, arrays):
+        self.classes_ = arrays["classes"]
+        self.class_count_ = arrays["class_count"]
+        self.theta_ = arrays["theta"]
+        self.var_ = arrays["var"]
+        self.priors_ = arrays["priors"]
+        self.shift_ = arrays["shift"]
+        self.quad_coef_ = arrays["quad_coef"]
+        self.lin_coef_ = arrays["lin_coef"]
+        self.intercept_ = arrays["intercept"]
+        self._set_params_dict()
+
+    def _joint_log_likelihood(self, X, out=None):
+        _check_dense(X)
+        if self.engine == "quadratic":
+            return self._joint_log_likelihood_quadratic(X, out=out)
+        if self.engine == "reference":
+            return self._joint_log_likelihood_reference(X, out=out)
+        raise ValueError(f"Unknown engine: {self.engine!r}")
+
+    def _joint_log_likelihood_quadratic(self, X, out=None):
+        X = np.asarray(X) - self.shift_
+        jll = np.matmul(X * X, self.quad_coef_, out=out)
+        jll += X @ self.lin_coef_
+        jll += self.intercept_
+        return jll
 
-    def _joint_log_likelihood(self, X):
+    def _joint_log_likelihood_reference(self, X, out=None):
         X = np.asarray(X)
         n_samples, n_features = X.shape
         n_classes = len(self.classes_)
-        jll = np.zeros((n_samples, n_classes))
+        jll = np.zeros((n_samples, n_classes)) if out is None else out
 
         for idx, c in enumerate(self.classes_):
             mu, var = self.params_[c]
@@ -47,11 +152,11 @@ class NaiveBayesContinuous(BaseEstimator, ClassifierMixin):
         return jll
 
     def predict_proba(self, X):
-        jll = self._joint_log_likelihood(X)
+        jll = self._score(X)
         log_prob_x = np.logaddexp.reduce(jll, axis=1, keepdims=True)
         return np.exp(jll - log_prob_x)
 
-    def predict(self, X):
-        jll = self._joint_log_likelihood(X)
-        class_index = np.argmax(jll, axis=1)
-        return self.classes_[class_index]
+def _check_dense(X):
+    if sp.issparse(X):
+        raise TypeError("NaiveBayesContinuous does not support sparse input; "
+                        "use X.toarray()")
@@ -1,105 +1,350 @@
 #!/usr/bin/env python3
 
 import numpy as np
-from sklearn.base import BaseEstimator, ClassifierMixin
+import scipy.sparse as sp
 
-class NaiveBayesDiscrete(BaseEstimator, ClassifierMixin):
-    def __init__(self, n_bins=5, laplace=False):
+from discretizer import Discretizer
+from nb_base import NaiveBayesBase
+
+class NaiveBayesDiscrete(NaiveBayesBase):
+    """
+    Naive Bayes over binned features.
+
+    strategy and bin_edges select how the bins are placed, see
+    Discretizer. With "fixed" edges (e.g. the bin_edges_ of a Discretizer
+    fitted at scale with partial_fit/merge) the binning is frozen and
+    independent of the training chunks, which partial_fit requires.
+
+    categorical_features hold integer category codes that are counted
+    directly instead of being binned (see Discretizer); n_categories fixes
+    their number of categories, otherwise it is learned from the data.
+
+    n_jobs threads score large batches, see NaiveBayesBase.
+
+    X may also be a scipy.sparse matrix (converted to CSR): only its
+    stored values are discretized and counted, the implicit zeros of each
+    feature are accounted for per class without densifying.
+    """
+
+    # small floor to avoid log(0)
+    eps = 1e-9
+
+    def __init__(self, n_bins=5, laplace=False, strategy="uniform",
+                 bin_edges=None, categorical_features=None,
+                 n_categories=None, n_jobs=None):
         self.n_bins = n_bins
         self.laplace = laplace
+        self.strategy = strategy
+        self.bin_edges = bin_edges
+        self.categorical_features = categorical_features
+        self.n_categories = n_categories
+        self.n_jobs = n_jobs
+
+    def partial_fit(self, X, y, classes=None):
+        """
+        Incrementally fit on one chunk, see NaiveBayesBase.partial_fit.
+        Only frozen binning makes this equal to fit on all chunks at
+        once, so strategy must be "fixed" and categorical features need
+        n_categories; learned edges would come from the first chunk alone.
+        """
+        if self.strategy != "fixed":
+            raise ValueError(
+                f'partial_fit needs strategy="fixed" edges, got '
+                f'{self.strategy!r}; fit a Discretizer on all chunks first '
+                f'and pass its bin_edges_'
+            )
+        if _has_features(self.categorical_features) and self.n_categories is None:
+            raise ValueError(
+                "partial_fit needs n_categories for categorical features"
+            )
+        return super().partial_fit(X, y, classes=classes)
+
+    def _init_state(self, X, classes):
+        self.classes_ = classes
+        self.discretizer_ = Discretizer(
+            n_bins=self.n_bins,
+            strategy=self.strategy,
+            bin_edges=self.bin_edges,
+            categorical_features=self.categorical_features,
+            n_categories=self.n_categories,
+        ).fit(X)
+        self._set_codes(self.discretizer_)
+
+        self.class_count_ = np.zeros(len(classes), dtype=np.int64)
+        self.feature_count_ = np.zeros(
+            (self.code_offsets_[-1] + self.n_codes_[-1], len(classes)),
+            dtype=np.int64,
+        )
+
+    def _set_codes(self, discretizer):
+        # The codes of all features are laid out one after the other, so
+        # that code c of feature j is row code_offsets_[j] + c of the
+        # (n_codes_total, n_classes) count and probability tables. A
+        # categorical feature with 10k levels thus costs 10k rows, not
+        # 10k rows for every feature.
+        self.bin_edges_ = discretizer.bin_edges_
+        self.n_codes_ = discretizer.n_codes_
+        self.code_offsets_ = np.concatenate(([0], np.cumsum(self.n_codes_)[:-1]))
+
+    def _accumulate(self, X, y_idx):
+        if sp.issparse(X):
+            self._accumulate_sparse(X, y_idx)
+        else:
+            self._accumulate_binned(self.discretize(X), y_idx)
+
+    def _accumulate_binned(self, Xb, y_idx):
+        n_classes = self.feature_count_.shape[1]
+
+        # One bincount over the flattened (code, class) index
+        flat = (Xb + self.code_offsets_) * n_classes + y_idx[:, None]
+        self.feature_count_ += np.bincount(
+            flat.ravel(), minlength=self.feature_count_.size
+        ).reshape(self.feature_count_.shape)
+        self.class_count_ += np.bincount(y_idx, minlength=n_classes)
+
+    def _accumulate_sparse(self, X, y_idx):
+        n_classes = self.feature_count_.shape[1]
+        n_features = X.shape[1]
+        zero_codes, data_codes = self.discretizer_.transform_sparse(X)
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        y_data = y_idx[rows]
+
+        # Stored values, then the implicit zeros: per feature and class,
+        # every sample without a stored value has the zero code
+        class_count = np.bincount(y_idx, minlength=n_classes)
+        stored = np.bincount(X.indices * n_classes + y_data,
+                             minlength=n_features * n_classes)
+        flat = (self.code_offsets_[X.indices] + data_codes) * n_classes + y_data
+        self.feature_count_ += np.bincount(
+            flat, minlength=self.feature_count_.size
+        ).reshape(self.feature_count_.shape)
+        self.feature_count_[self.code_offsets_ + zero_codes] += (
+            class_count - stored.reshape(n_features, n_classes)
+        )
+        self.class_count_ += class_count
+
+    def _update_model(self):
+        with np.errstate(divide="ignore"):
+            self.priors_ = self.class_count_ / self.class_count_.sum()
+            self.log_priors_ = np.log(self.priors_)
+
+        prob = self._smoothed_prob()
+        self.cond_prob_ = self._split_features(prob)
+        # (n_codes_total, n_classes) table of floored log-probabilities,
+        # so that scoring is a single gather + sum
+        self.log_prob_ = np.log(np.clip(prob, self.eps, None))
+
+    def _smoothed_prob(self):
+        """P(code | class) from the counts, normalized within each feature."""
+        counts = self.feature_count_.copy()
+        if self.laplace:
+            counts += 1  # add-one smoothing on all codes
+        denom = np.add.reduceat(counts, self.code_offsets_, axis=0)
+        denom = np.repeat(denom, self.n_codes_, axis=0)
+        with np.errstate(invalid="ignore"):
+            return np.where(denom > 0, counts / denom, 0.0)
 
-    def fit(self, X, y):
-        X = np.asarray(X)
-        y = np.asarray(y)
-        self.classes_, counts = np.unique(y, return_counts=True)
-        n_classes = len(self.classes_)
-        n_samples, n_features = X.shape
-
-        self.priors_ = counts / n_samples
-        self.bin_edges_ = [
-            np.histogram_bin_edges(X[:, j], bins=self.n_bins)
-            for j in range(n_features)
+    def _split_features(self, prob):
+        """Per-feature (n_classes, n_codes_j) views of a stacked table."""
+        return [
+            prob[start:start + n].T
+            for start, n in zip(self.code_offsets_, self.n_codes_)
         ]
 
-        Xb = self._discretize(X)
+    def _state_arrays(self, dtype):
+        n_edges = np.array([
+            0 if e is None else len(e) for e in self.bin_edges_
+        ])
+        edges = np.full((len(n_edges), n_edges.max()), np.nan)
+        for row, e in zip(edges, self.bin_edges_):
+            if e is not None:
+                row[:len(e)] = e
+        return {
+            "classes": self._saved_classes(),
+            "class_count": self.class_count_,
+            "feature_count": self.feature_count_,
+            "priors": self.priors_,
+            "log_priors": self.log_priors_.astype(dtype),
+            "log_prob": self.log_prob_.astype(dtype),
+            "bin_edges": edges,
+            "n_edges": n_edges,
+            "categorical": self.discretizer_.categorical_,
+            "n_categories": self.discretizer_.n_categories_,
+        }
 
-        # Include an extra index 0 that will not be used, so that binned
-        # feature values coming out of np.digitize can be used directly as indices
-        self.cond_prob_ = [
-            np.zeros((n_classes, len(edges) + 1))
-            for edges in self.bin_edges_
+    def _set_state(self, arrays):
+        self.classes_ = arrays["classes"]
+        self.class_count_ = arrays["class_count"]
+        self.feature_count_ = arrays["feature_count"]
+        self.priors_ = arrays["priors"]
+        self.log_priors_ = arrays["log_priors"]
+        self.log_prob_ = arrays["log_prob"]
+        edges = [
+            None if is_cat else e[:n]
+            for e, n, is_cat in zip(arrays["bin_edges"], arrays["n_edges"],
+                                    arrays["categorical"])
         ]
+        self.discretizer_ = Discretizer.from_edges(edges,
+                                                   arrays["n_categories"])
+        self._set_codes(self.discretizer_)
+        self.cond_prob_ = self._split_features(self._smoothed_prob())
 
-        for j, edges in enumerate(self.bin_edges_):
-            n_bins_j = len(edges)
-            for c_idx, c in enumerate(self.classes_):
-                Xb_c = Xb[y == c, j]
-                counts = np.bincount(Xb_c, minlength=n_bins_j + 1)
-                if self.laplace:
-                    counts += 1  # add-one smoothing on all bins
-                denom = counts.sum()
-                self.cond_prob_[j][c_idx, :] = counts / denom
+    @classmethod
+    def from_counts(cls, feature_count, class_count, classes, edges,
+                    n_levels=None, **params):
+        """
+        Build a fitted model from precomputed sufficient statistics:
+        feature_count of shape (n_codes_total, n_classes) with the counts
+        of every feature's codes stacked feature after feature (see
+        code_offsets_), class_count of shape (n_classes,) and the
+        per-feature edges. Categorical features have edges None and
+        n_levels[j] categories. params are passed to the constructor.
+        """
+        model = cls(**params)
+        model.classes_ = np.asarray(classes)
+        model.class_count_ = np.array(class_count, dtype=np.int64)
+        model.feature_count_ = np.array(feature_count, dtype=np.int64)
+        edges = [None if e is None else np.asarray(e, dtype=float)
+                 for e in edges]
+        model.discretizer_ = Discretizer.from_edges(edges, n_levels)
+        model._set_codes(model.discretizer_)
+        if len(model.feature_count_) != model.n_codes_.sum():
+            raise ValueError(
+                f"feature_count has {len(model.feature_count_)} rows, "
+                f"expected {model.n_codes_.sum()}"
+            )
+        model._update_model()
+        return model
 
-        return self
+    def coarsen(self, n_bins):
+        """
+        Derive the model with n_bins bins per feature by merging adjacent
+        bins of this one, without another pass over the data.
+        Only uniform edges nest: every k-th edge of the self.n_bins
+        equal-width bins is an edge of the n_bins model fitted on the
+        same data. Quantile and fixed edges raise ValueError, refit those.
+        n_bins must divide self.n_bins. Categorical features are kept as
+        they are.
+        """
+        code_map = self.coarse_code_map(n_bins)
+        edges = [
+            None if e is None else e[::(len(e) - 1) // n_bins]
+            for e in self.bin_edges_
+        ]
+        n_codes = np.array([
+            n if e is None else n_bins + 2
+            for e, n in zip(edges, self.n_codes_)
+        ])
+        offsets = np.concatenate(([0], np.cumsum(n_codes)[:-1]))
+        rows = np.repeat(offsets, self.n_codes_) + code_map
 
-    def predict_proba(self, X):
-        Xb = self._discretize(X)
-        n_samples, n_features = Xb.shape
-        n_classes = len(self.classes_)
-
-        log_priors = np.log(self.priors_)
-        log_proba = np.zeros((n_samples, n_classes))
-
-        # small floor to avoid log(0)
-        eps = 1e-9
-
-        for c_idx in range(n_classes):
-            log_p = log_priors[c_idx]
-            for j in range(n_features):
-                prob_j = self.cond_prob_[j][c_idx, Xb[:, j]]
-                # clip to avoid zero
-                prob_j = np.clip(prob_j, eps, None)
-                log_p += np.log(prob_j)
-            log_proba[:, c_idx] = log_p
-
-        # Convert log-probabilities to actual probabilities
-        max_log = np.max(log_proba, axis=1, keepdims=True)
-        exp_log = np.exp(log_proba - max_log)
-        proba = exp_log / exp_log.sum(axis=1, keepdims=True)
+        counts = np.zeros((n_codes.sum(), self.feature_count_.shape[1]),
+                          dtype=np.int64)
+        np.add.at(counts, rows, self.feature_count_)
+        params = dict(self.get_params(), n_bins=n_bins)
+        return self.from_counts(counts, self.class_count_, self.classes_,
+                                edges, self.discretizer_.n_categories_,
+                                **params)
 
-        return proba
+    def with_laplace(self, laplace):
+        """
+        The same fitted model with the given laplace setting, built from
+        feature_count_ without another pass over the data.
+        """
+        params = dict(self.get_params(), laplace=laplace)
+        return self.from_counts(self.feature_count_, self.class_count_,
+                                self.classes_, self.bin_edges_,
+                                self.discretizer_.n_categories_, **params)
 
-    def predict(self, X):
-        proba = self.predict_proba(X)
-        idx = np.argmax(proba, axis=1)
-        return self.classes_[idx]
+    def coarse_code_map(self, n_bins):
+        """
+        Array mapping this model's stacked codes to the codes of
+        coarsen(n_bins), e.g. code_map[Xb + code_offsets_].
+        """
+        if self.strategy != "uniform":
+            raise ValueError(
+                f"Only uniform bins can be merged, not {self.strategy!r} ones"
+            )
+        maps = []
+        for j, (edges, n) in enumerate(zip(self.bin_edges_, self.n_codes_)):
+            codes = np.arange(n)
+            if edges is None:
+                maps.append(codes)
+                continue
+            n_fine = len(edges) - 1
+            if n_fine != self.n_bins:
+                raise ValueError(
+                    f"Feature {j} has {n_fine} bins, expected {self.n_bins}"
+                )
+            if n_fine < n_bins or n_fine % n_bins:
+                raise ValueError(
+                    f"Feature {j} has {n_fine} bins, which cannot be "
+                    f"merged into {n_bins}"
+                )
+            k = n_fine // n_bins
+            # Fine bin i falls into coarse bin ceil(i / k); this also maps
+            # the under- and overflow codes 0 and n_fine + 1 to 0 and n_bins + 1
+            maps.append((codes + k - 1) // k)
+        return np.concatenate(maps)
 
-    def _discretize(self, X):
-        X = np.asarray(X)
-        n_samples, n_features = X.shape
-        Xb = np.zeros_like(X, dtype=int)
-        for j, edges in enumerate(self.bin_edges_):
-            Xb[:, j] = np.digitize(X[:, j], edges, right=False)
-        return Xb
+    def _joint_log_likelihood(self, X, out=None):
+        if sp.issparse(X):
+            return self._joint_log_likelihood_sparse(X, out=out)
+        return self._joint_log_likelihood_binned(self.discretize(X), out=out)
 
-    def predict_log_proba(self, X):
+    def score_binned(self, Xb):
         """
-        Return the joint log‐likelihoods log P(c) + sum_j log P(x_j|c)
-        (i.e. before any softmax normalization).
+        Joint log-likelihoods like predict_log_proba, for the bin codes
+        Xb = discretize(X) (or coarse_code_map codes) computed once and
+        shared between models.
         """
-        Xb = self._discretize(X)
-        n_samples, n_features = Xb.shape
-        n_classes = len(self.classes_)
-
-        log_priors = np.log(self.priors_)
-        log_proba = np.zeros((n_samples, n_classes))
-
-        for c_idx in range(n_classes):
-            lp = log_priors[c_idx]
-            for j in range(n_features):
-                pj = self.cond_prob_[j][c_idx, Xb[:, j]]
-                pj = np.clip(pj, 1e-9, None)
-                lp = lp + np.log(pj)
-            log_proba[:, c_idx] = lp
-
-        return log_proba
+        return self._joint_log_likelihood_binned(np.asarray(Xb))
+
+    def _joint_log_likelihood_binned(self, Xb, out=None):
+        # (n_samples, n_features, n_classes) gather, summed over features
+        ll = self.log_prob_[Xb + self.code_offsets_]
+        # Fold the priors into the first feature so that the features are
+        # accumulated in the same order as log P(c) + sum_j log P(x_j|c)
+        ll[:, 0] += self.log_priors_
+        return ll.sum(axis=1, out=out)
+
+    def _joint_log_likelihood_sparse(self, X, out=None):
+        zero_codes, data_codes = self.discretizer_.transform_sparse(X)
+        # Score every row as if it were all zeros, then correct the
+        # features that are stored
+        zero_ll = self.log_prob_[self.code_offsets_ + zero_codes]
+        base = self.log_priors_ + zero_ll.sum(axis=0)
+        if out is None:
+            out = np.empty((X.shape[0], len(self.classes_)))
+        out[:] = base
+
+        if X.nnz:
+            delta = self.log_prob_[self.code_offsets_[X.indices] + data_codes]
+            delta -= zero_ll[X.indices]
+            # reduceat needs non-empty segments, so skip the empty rows
+            filled = np.flatnonzero(np.diff(X.indptr))
+            out[filled] += np.add.reduceat(delta, X.indptr[filled], axis=0)
+        return out
+
+    def predict_proba(self, X):
+        proba = self._score(X)
+
+        # Convert log-probabilities to actual probabilities, in place
+        proba -= np.max(proba, axis=1, keepdims=True)
+        np.exp(proba, out=proba)
+        proba /= proba.sum(axis=1, keepdims=True)
+
+        return proba
+
+    def discretize(self, X):
+        """Bin codes of X, one column per feature, see Discretizer."""
+        if sp.issparse(X):
+            X = X.toarray()
+        return self.discretizer_.transform(X)
+
+def _has_features(features):
+    """True if features (None, a boolean mask or indices) selects any."""
+    if features is None:
+        return False
+    features = np.asarray(features)
+    return bool(features.any()) if features.dtype == bool else features.size > 0
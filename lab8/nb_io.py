@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import json
+import struct
+
+import numpy as np
+
+# File layout:
+#   MAGIC | uint64 header length | JSON header | arrays
+# Every array is stored C-contiguous at an ALIGN-byte aligned offset, so
+# it can be memory-mapped straight from the file and shared read-only
+# between processes through the page cache.
+MAGIC = b"NBMODEL1"
+ALIGN = 64
+
+def save_arrays(path, arrays, meta):
+    """
+    Write a dict of ndarrays plus JSON-serialisable meta to path.
+    """
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    for name, a in arrays.items():
+        if a.dtype.hasobject:
+            raise TypeError(f"Array {name!r} has object dtype")
+
+    # The header size depends on the offsets and vice versa, so lay the
+    # arrays out relative to the start of the data section first
+    layout = {}
+    offset = 0
+    for name, a in arrays.items():
+        offset = _align(offset)
+        layout[name] = {
+            "dtype": a.dtype.str,
+            "shape": list(a.shape),
+            "offset": offset,
+        }
+        offset += a.nbytes
+    header = json.dumps(
+        {"meta": meta, "arrays": layout}, default=_to_json
+    ).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, a in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(a.tobytes())
+        f.truncate(data_start + offset)
+
+def load_arrays(path, mmap=True):
+    """
+    Read a file written by save_arrays and return (arrays, meta).
+    With mmap=True the arrays are read-only views of the file.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Naive Bayes model file")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+    data_start = _align(len(MAGIC) + 8 + header_len)
+
+    arrays = {}
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"])
+        shape = tuple(info["shape"])
+        offset = data_start + info["offset"]
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+        elif mmap:
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r",
+                                     offset=offset, shape=shape)
+        else:
+            arrays[name] = np.fromfile(
+                path, dtype=dtype, count=int(np.prod(shape)), offset=offset
+            ).reshape(shape)
+    return arrays, header["meta"]
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+def _to_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
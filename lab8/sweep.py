@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import StratifiedKFold
+
+from nb_discrete import NaiveBayesDiscrete
+
+# Largest bin count fitted just to derive coarser models from it
+MAX_FINE_BINS = 1024
+
+# Per-process copies of the datasets and folds, set once by _init_worker
+# so that tasks only carry (dataset, fold, bin counts)
+_DATASETS = {}
+_FOLDS = {}
+
+def cv_folds(y, n_splits=5, random_state=0):
+    """Stratified (train_idx, test_idx) pairs for y."""
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True,
+                          random_state=random_state)
+    return list(skf.split(np.zeros(len(y)), y))
+
+def nested_bins(bins_list):
+    """
+    Group bin counts so that each group can be derived from one fit.
+    Returns {fine_bins: [bin counts that divide fine_bins]}: a single
+    group at their least common multiple when that is small enough,
+    otherwise greedily from the largest count down.
+    """
+    bins_list = sorted(set(bins_list), reverse=True)
+    lcm = math.lcm(*bins_list)
+    if lcm <= MAX_FINE_BINS:
+        return {lcm: bins_list}
+    groups = {}
+    for b in bins_list:
+        fine = next((f for f in groups if f % b == 0), b)
+        groups.setdefault(fine, []).append(b)
+    return groups
+
+def bin_groups(bins_list, strategy):
+    """
+    nested_bins for uniform bins; any other strategy has edges that do
+    not nest, so every bin count is fitted on its own.
+    """
+    if strategy == "uniform":
+        return nested_bins(bins_list)
+    return {b: [b] for b in sorted(set(bins_list), reverse=True)}
+
+def fit_bin_sweep(X, y, bins_list, **params):
+    """
+    Fit NaiveBayesDiscrete for every bin count in bins_list, deriving
+    nested uniform counts with coarsen instead of refitting.
+    Returns {n_bins: model}.
+    """
+    models = {}
+    groups = bin_groups(bins_list, params.get("strategy", "uniform"))
+    for fine_bins, group in groups.items():
+        fine = NaiveBayesDiscrete(n_bins=fine_bins, **params).fit(X, y)
+        for b in group:
+            models[b] = fine if b == fine_bins else fine.coarsen(b)
+    return models
+
+def run_sweep(datasets, bins_list, laplace_options=(False, True),
+              n_splits=5, strategy="uniform", n_jobs=None, random_state=0):
+    """
+    Cross-validate NaiveBayesDiscrete over every dataset x fold x n_bins
+    x laplace combination.
+
+    datasets maps a name to (X, y) or (X, y, categorical_features).
+    Each (dataset, fold, fine n_bins) task discretizes and counts its
+    fold once at the fine bin count (see bin_groups), derives the
+    coarser uniform bin counts from those counts and all the laplace
+    variants from each of them. Tasks run in a process
+    pool of n_jobs workers (all cores by default, inline for n_jobs=1).
+
+    Returns a DataFrame with one row per configuration and fold.
+    """
+    folds = {
+        name: cv_folds(y, n_splits=n_splits, random_state=random_state)
+        for name, (X, y, *_) in datasets.items()
+    }
+    tasks = [
+        (name, fold, fine_bins, group, tuple(laplace_options), strategy)
+        for name in datasets
+        for fold in range(n_splits)
+        for fine_bins, group in bin_groups(bins_list, strategy).items()
+    ]
+
+    if n_jobs is None:
+        n_jobs = os.cpu_count()
+    if n_jobs == 1:
+        results = [_run_task(task, datasets, folds) for task in tasks]
+    else:
+        pool = ProcessPoolExecutor(max_workers=n_jobs,
+                                   initializer=_init_worker,
+                                   initargs=(datasets, folds))
+        with pool:
+            results = list(pool.map(_run_worker_task, tasks))
+
+    rows = [row for task_rows in results for row in task_rows]
+    keys = ["dataset", "n_bins", "laplace", "fold"]
+    return pd.DataFrame(rows).sort_values(keys, ignore_index=True)
+
+def summarize(results):
+    """Mean and standard deviation over folds of every configuration."""
+    keys = ["dataset", "strategy", "n_bins", "laplace"]
+    return (results.groupby(keys)[["accuracy", "log_loss"]]
+            .agg(["mean", "std"])
+            .reset_index())
+
+def _init_worker(datasets, folds):
+    _DATASETS.update(datasets)
+    _FOLDS.update(folds)
+
+def _run_worker_task(task):
+    return _run_task(task, _DATASETS, _FOLDS)
+
+def _run_task(task, datasets, folds):
+    name, fold, fine_bins, group, laplace_options, strategy = task
+    X, y, *categorical = datasets[name]
+    params = {
+        "strategy": strategy,
+        "categorical_features": categorical[0] if categorical else None,
+    }
+    train, test = folds[name][fold]
+    X_train, y_train = X[train], y[train]
+    y_test = y[test]
+
+    fine = NaiveBayesDiscrete(n_bins=fine_bins, **params).fit(X_train, y_train)
+    # One discretized copy of the test fold, shared by every configuration
+    Xb_test = fine.discretize(X[test])
+    # Rows of the test codes in the stacked tables, for coarse_code_map
+    test_rows = Xb_test + fine.code_offsets_
+
+    rows = []
+    for n_bins in group:
+        if n_bins == fine_bins:
+            model, Xb = fine, Xb_test
+        else:
+            model = fine.coarsen(n_bins)
+            Xb = fine.coarse_code_map(n_bins)[test_rows]
+
+        for laplace in laplace_options:
+            jll = model.with_laplace(laplace).score_binned(Xb)
+            y_pred = model.classes_[np.argmax(jll, axis=1)]
+            jll -= jll.max(axis=1, keepdims=True)
+            proba = np.exp(jll)
+            proba /= proba.sum(axis=1, keepdims=True)
+            rows.append({
+                "dataset": name,
+                "strategy": strategy,
+                "n_bins": n_bins,
+                "laplace": laplace,
+                "fold": fold,
+                "n_train": len(train),
+                "n_test": len(test),
+                "accuracy": accuracy_score(y_test, y_pred),
+                "log_loss": log_loss(y_test, proba, labels=model.classes_),
+            })
+    return rows
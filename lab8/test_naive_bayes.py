@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from discretizer import Discretizer
+from nb_continuous import NaiveBayesContinuous
+from nb_discrete import NaiveBayesDiscrete
+from sweep import fit_bin_sweep
+
+def make_data(n=10000, n_features=4, seed=0):
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 3, n)
+    X = rng.normal(size=(n, n_features)) + 0.5 * y[:, None]
+    return X, y
+
+def make_sparse_data(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    X, y = make_data(n=n, n_features=5, seed=seed)
+    X[rng.random(X.shape) < 0.7] = 0.0
+    # Column 4 holds category codes, mostly the implicit zero
+    X[:, 4] = np.where(rng.random(n) < 0.3, (y + rng.integers(0, 2, n)) % 4, 0)
+    return X, y
+
+def fit_in_chunks(model, X, y, n_chunks=10):
+    classes = np.unique(y)
+    for X_c, y_c in zip(np.array_split(X, n_chunks), np.array_split(y, n_chunks)):
+        model.partial_fit(X_c, y_c, classes=classes)
+    return model
+
+def test_discrete_partial_fit_rejects_learned_edges():
+    X, y = make_data()
+    with pytest.raises(ValueError, match="fixed"):
+        fit_in_chunks(NaiveBayesDiscrete(), X, y)
+    with pytest.raises(ValueError, match="n_categories"):
+        NaiveBayesDiscrete(strategy="fixed", bin_edges=[0.0, 1.0],
+                           categorical_features=[0]).partial_fit(
+                               X, y, classes=np.unique(y))
+
+def test_discrete_partial_fit_matches_fit():
+    X, y = make_data()
+    # Default settings: the edges of fit are learned from all of X
+    full = NaiveBayesDiscrete().fit(X, y)
+    edges = Discretizer().fit(X).bin_edges_
+    chunked = fit_in_chunks(
+        NaiveBayesDiscrete(strategy="fixed", bin_edges=edges), X, y
+    )
+    np.testing.assert_array_equal(chunked.feature_count_, full.feature_count_)
+    np.testing.assert_array_equal(chunked.predict(X), full.predict(X))
+    np.testing.assert_allclose(chunked.predict_proba(X), full.predict_proba(X))
+
+def test_continuous_partial_fit_matches_fit():
+    X, y = make_data()
+    full = NaiveBayesContinuous().fit(X, y)
+    chunked = fit_in_chunks(NaiveBayesContinuous(), X, y)
+    np.testing.assert_array_equal(chunked.predict(X), full.predict(X))
+    np.testing.assert_allclose(chunked.predict_proba(X), full.predict_proba(X))
+
+def test_coarsen_only_merges_uniform_bins():
+    # Ties collapse the quantile edges, every k-th edge is not a quantile
+    rng = np.random.default_rng(0)
+    x = np.concatenate([np.zeros(30), np.ones(30), rng.normal(5, 1, 140)])
+    X, y = x[:, None], np.arange(len(x)) % 2
+    fine = NaiveBayesDiscrete(n_bins=4, strategy="quantile").fit(X, y)
+    with pytest.raises(ValueError, match="uniform"):
+        fine.coarsen(2)
+
+    models = fit_bin_sweep(X, y, [2, 4], strategy="quantile")
+    for n_bins, model in models.items():
+        direct = NaiveBayesDiscrete(n_bins=n_bins, strategy="quantile").fit(X, y)
+        np.testing.assert_array_equal(model.bin_edges_[0], direct.bin_edges_[0])
+        np.testing.assert_array_equal(model.feature_count_, direct.feature_count_)
+
+def test_coarsen_uniform_matches_fit():
+    X, y = make_data()
+    models = fit_bin_sweep(X, y, [2, 3, 6])
+    for n_bins, model in models.items():
+        direct = NaiveBayesDiscrete(n_bins=n_bins).fit(X, y)
+        np.testing.assert_array_equal(model.feature_count_, direct.feature_count_)
+        np.testing.assert_array_equal(model.predict(X), direct.predict(X))
+
+@pytest.mark.parametrize("model", [NaiveBayesDiscrete(), NaiveBayesContinuous()])
+def test_chunked_prediction_accepts_lists(model):
+    X, y = make_data(n=500)
+    model.fit(X, y)
+    expected = model.predict(X)
+    X_list = X.tolist()
+    np.testing.assert_array_equal(model.predict_chunked(X_list, chunk_size=64),
+                                  expected)
+    np.testing.assert_array_equal(
+        np.concatenate(list(model.iter_predict(X_list, chunk_size=64))),
+        expected,
+    )
+
+def test_predict_topk_checks_k():
+    X, y = make_data(n=500)
+    model = NaiveBayesDiscrete().fit(X, y)
+    for k in (0, -1, 1.5):
+        with pytest.raises(ValueError, match="positive integer"):
+            model.predict_topk(X, k=k)
+    top = model.predict_topk(X, k=10)
+    assert top.shape == (len(X), len(model.classes_))
+    np.testing.assert_array_equal(top[:, 0], model.predict(X))
+
+@pytest.mark.parametrize("offset, scale", [(0.0, 1.0), (1e7, 1.0), (1e9, 1e-3)])
+def test_quadratic_engine_matches_reference(offset, scale):
+    X, y = make_data(n=2000)
+    X = offset + scale * X
+    fast = NaiveBayesContinuous(engine="quadratic").fit(X, y)
+    reference = NaiveBayesContinuous(engine="reference").fit(X, y)
+    np.testing.assert_array_equal(fast.predict(X), reference.predict(X))
+    np.testing.assert_allclose(fast.predict_log_proba(X),
+                               reference.predict_log_proba(X), rtol=1e-9)
+
+def test_with_laplace_matches_fit():
+    X, y = make_data(n=500)
+    model = NaiveBayesDiscrete().fit(X, y)
+    smoothed = model.with_laplace(True)
+    direct = NaiveBayesDiscrete(laplace=True).fit(X, y)
+    assert not model.laplace
+    np.testing.assert_array_equal(smoothed.log_prob_, direct.log_prob_)
+    np.testing.assert_array_equal(smoothed.score_binned(model.discretize(X)),
+                                  direct.predict_log_proba(X))
+
+@pytest.mark.parametrize("cls", [NaiveBayesDiscrete, NaiveBayesContinuous])
+def test_threaded_scoring_matches_serial(cls):
+    X, y = make_data(n=20000)
+    serial = cls(n_jobs=1).fit(X, y)
+    threaded = cls(n_jobs=4).fit(X, y)
+    np.testing.assert_array_equal(threaded.predict_log_proba(X),
+                                  serial.predict_log_proba(X))
+    expected = serial.predict(X)
+    np.testing.assert_array_equal(threaded.predict(X), expected)
+    np.testing.assert_array_equal(
+        threaded.predict_chunked(X, chunk_size=10000), expected
+    )
+    np.testing.assert_array_equal(
+        np.concatenate(list(threaded.iter_predict(X, chunk_size=10000))),
+        expected,
+    )
+
+@pytest.mark.parametrize("strategy", ["uniform", "quantile"])
+def test_sparse_matches_dense(strategy):
+    X, y = make_sparse_data()
+    params = dict(strategy=strategy, categorical_features=[4])
+    dense = NaiveBayesDiscrete(**params).fit(X, y)
+    sparse = NaiveBayesDiscrete(**params).fit(sp.csr_matrix(X), y)
+    np.testing.assert_array_equal(sparse.feature_count_, dense.feature_count_)
+    np.testing.assert_allclose(sparse.predict_log_proba(sp.csr_matrix(X)),
+                               dense.predict_log_proba(X))
+    np.testing.assert_array_equal(sparse.predict(sp.csr_matrix(X)),
+                                  dense.predict(X))
+
+def test_unknown_category_slot():
+    X, y = make_data(n=2000, n_features=3)
+    rng = np.random.default_rng(1)
+    X_cat = np.column_stack([X, (y + rng.integers(0, 2, len(y))) % 4])
+    model = NaiveBayesDiscrete(categorical_features=[3]).fit(X_cat, y)
+    # Four categories plus the unknown code 4, never seen in training
+    unknown = model.code_offsets_[3] + 4
+    assert model.n_codes_[3] == 5
+    np.testing.assert_array_equal(model.feature_count_[unknown], 0)
+
+    X_new = X_cat.copy()
+    X_new[:, 3] = np.resize([-1, 4, 99, np.nan], len(X_new))
+    np.testing.assert_array_equal(model.discretize(X_new)[:, 3], 4)
+    # The unknown code scores the floor for every class, which leaves
+    # the ranking to the other features
+    without = NaiveBayesDiscrete().fit(X, y)
+    np.testing.assert_allclose(
+        model.predict_log_proba(X_new) - without.predict_log_proba(X),
+        np.log(model.eps),
+    )
+    np.testing.assert_array_equal(model.predict(X_new), without.predict(X))
+
+def fixed_discrete(X):
+    return NaiveBayesDiscrete(strategy="fixed",
+                              bin_edges=Discretizer().fit(X).bin_edges_)
+
+@pytest.mark.parametrize("make_model", [fixed_discrete,
+                                        lambda X: NaiveBayesContinuous()])
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_save_load_round_trip(tmp_path, make_model, mmap, dtype):
+    X, y = make_data(n=2000)
+    model = make_model(X).fit(X, y)
+    path = tmp_path / "model.nb"
+    model.save(path, dtype=dtype)
+    loaded = type(model).load(path, mmap=mmap)
+
+    np.testing.assert_array_equal(loaded.classes_, model.classes_)
+    np.testing.assert_array_equal(loaded.class_count_, model.class_count_)
+    if dtype == np.float64:
+        np.testing.assert_array_equal(loaded.predict_log_proba(X),
+                                      model.predict_log_proba(X))
+        np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    else:
+        np.testing.assert_allclose(loaded.predict_log_proba(X),
+                                   model.predict_log_proba(X), rtol=1e-5)
+
+@pytest.mark.parametrize("make_model", [fixed_discrete,
+                                        lambda X: NaiveBayesContinuous()])
+def test_partial_fit_after_load(tmp_path, make_model):
+    X, y = make_data()
+    half = len(X) // 2
+    model = make_model(X).partial_fit(X[:half], y[:half], classes=np.unique(y))
+    path = tmp_path / "model.nb"
+    model.save(path)
+
+    with pytest.raises(ValueError, match="mmap=False"):
+        type(model).load(path).partial_fit(X[half:], y[half:])
+    resumed = type(model).load(path, mmap=False).partial_fit(X[half:], y[half:])
+    full = make_model(X).fit(X, y)
+    np.testing.assert_array_equal(resumed.predict(X), full.predict(X))
+    np.testing.assert_allclose(resumed.predict_proba(X), full.predict_proba(X))